@@ -1,43 +1,60 @@
 from base_bot import BaseBot
+from disclosures import DisclosureIngestor
+from records import Fund, Holding
 import time
 import random
 
 class AMCBot(BaseBot):
     def __init__(self):
         super().__init__("AMC Portfolio Disclosure Bot")
+        self.ingestor = DisclosureIngestor(self.db, change_feed=self.change_feed)
 
     def execute(self):
-        """Simulate scraping mutual fund information from AMC websites"""
-        print(f"{self.bot_name}: Simulating mutual fund information update")
+        """Ingest downloaded AMC portfolio disclosures, or simulate an update when there are none"""
+        if self.ingestor.pending_files():
+            self.logger.info("Ingesting portfolio disclosures from %s", self.ingestor.directory)
+            with self.phase("ingest"):
+                reports = self.ingestor.ingest_directory(self.deadline)
+            failed = [report["file"] for report in reports if "error" in report]
+            if failed:
+                raise RuntimeError(f"Failed to ingest disclosures: {', '.join(failed)}")
+            self.logger.info("Ingested %d disclosure file(s)", len(reports))
+            return
+        
+        self.logger.info("Simulating mutual fund information update")
         
         # Simulate processing time
-        time.sleep(random.uniform(2, 5))
+        with self.phase("fetch"):
+            self.deadline.sleep(random.uniform(2, 5))
         
         # For demonstration, we'll simulate adding funds and holdings
-        self.db.connect()
-        
         # Add a new fund
-        fund_data = (
+        fund = Fund(
             f"mf{int(time.time())}",
             "New Vision Growth Fund",
             "New AMC",
             "Flexi Cap"
         )
-        self.db.add_fund(fund_data)
         
         # Add holdings for the new fund
-        fund_id = fund_data[0]
         holdings = [
-            (fund_id, "s1", round(random.uniform(5, 10), 2)),
-            (fund_id, "s2", round(random.uniform(5, 10), 2))
+            Holding(fund.id, "s1", round(random.uniform(5, 10), 2)),
+            Holding(fund.id, "s2", round(random.uniform(5, 10), 2))
         ]
         
-        for holding in holdings:
-            self.db.add_fund_holding(holding)
+        # Don't start writing once the run has been cancelled or overrun its budget
+        self.deadline.check()
+        
+        # Fund and holdings land together or not at all
+        with self.phase("db_write"), self.db.transaction():
+            self.db.add_fund(fund)
+            self.db.add_fund_holdings(holdings)
+            self.db.refresh_stock_fund_index([fund.id])
         
-        self.db.disconnect()
+        self.change_feed.publish("fund", [fund])
+        self.change_feed.publish("holding", holdings)
         
-        print(f"{self.bot_name}: Mutual fund information updated successfully")
+        self.logger.info("Mutual fund information updated successfully")
 
 if __name__ == "__main__":
     bot = AMCBot()
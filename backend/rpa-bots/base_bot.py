@@ -2,58 +2,69 @@ import time
 import uuid
 from datetime import datetime
 from database import Database
+from deadline import Deadline
+from bot_log_writer import get_bot_log_writer
+from change_feed import get_change_feed
+from log_config import get_logger
+import metrics
 
 class BaseBot:
     def __init__(self, bot_name):
         self.bot_name = bot_name
-        self.db = Database()
+        self.db = Database(label=bot_name)
+        self.logger = get_logger("bot", bot=bot_name)
+        # Time budget of the current run; execute() checks it between steps
+        self.deadline = Deadline()
+        # Committed changes are published here for the API to pick up incrementally
+        self.change_feed = get_change_feed()
 
-    def log_start(self):
-        """Log bot start"""
-        log_id = f"log{int(time.time() * 1000000)}"  # Use microseconds for uniqueness
-        log_data = (
+    def _write_log(self, log_id, status, execution_time, result):
+        # bot_logs rows are written in batches off the bot's thread
+        get_bot_log_writer().submit((
             log_id,
             self.bot_name,
-            'In Progress',
-            0.0,
+            status,
+            execution_time,
             datetime.now(),
-            'Bot started'
-        )
-        self.db.connect()
-        self.db.add_bot_log(log_data)
-        self.db.disconnect()
+            result
+        ))
+
+    def log_start(self):
+        """Log bot start"""
+        log_id = f"log{int(time.time() * 1000000)}"  # Use microseconds for uniqueness
+        self._write_log(log_id, 'In Progress', 0.0, 'Bot started')
         return log_id
 
     def log_success(self, log_id, execution_time, result="Bot run completed successfully"):
         """Log bot success"""
-        self.db.connect()
-        self.db.add_bot_log((
-            log_id,
-            self.bot_name,
-            'Success',
-            execution_time,
-            datetime.now(),
-            result
-        ))
-        self.db.disconnect()
+        self._write_log(log_id, 'Success', execution_time, result)
 
     def log_failure(self, log_id, execution_time, error_message):
         """Log bot failure"""
-        self.db.connect()
-        self.db.add_bot_log((
-            log_id,
-            self.bot_name,
-            'Failure',
-            execution_time,
-            datetime.now(),
-            error_message
-        ))
-        self.db.disconnect()
+        self._write_log(log_id, 'Failure', execution_time, error_message)
 
-    def run(self):
+    def run(self, deadline=None):
         """Main bot execution method"""
-        print(f"{self.bot_name}: Starting bot execution")
+        self.logger.info("Starting bot execution")
+        self.deadline = deadline or Deadline()
         
+        # Hold one pooled connection for the whole run; the connect/disconnect calls in
+        # execute() nest inside it instead of reopening the file.
+        start_time = time.perf_counter()
+        status = "Failure"
+        try:
+            with self.db:
+                self._run()
+            status = "Success"
+        finally:
+            metrics.observe("rpa_bot_run_seconds", time.perf_counter() - start_time, bot=self.bot_name, status=status)
+            metrics.export()
+
+    def phase(self, name):
+        """Time one phase of execute() (fetch, parse, db_write) into the phase histogram"""
+        return metrics.timer("rpa_bot_phase_seconds", bot=self.bot_name, phase=name)
+
+    def _run(self):
         # Log start
         log_id = self.log_start()
         
@@ -68,7 +79,7 @@ class BaseBot:
             success_log_id = f"log{int(time.time() * 1000000)}"  # Generate new unique ID
             self.log_success(success_log_id, execution_time)
             
-            print(f"{self.bot_name}: Bot execution completed successfully in {execution_time} seconds")
+            self.logger.info("Bot execution completed successfully in %s seconds", execution_time)
             
         except Exception as e:
             # Log failure
@@ -76,7 +87,7 @@ class BaseBot:
             failure_log_id = f"log{int(time.time() * 1000000)}"  # Generate new unique ID
             self.log_failure(failure_log_id, execution_time, str(e))
             
-            print(f"{self.bot_name}: Bot execution failed after {execution_time} seconds: {e}")
+            self.logger.error("Bot execution failed after %s seconds: %s", execution_time, e)
             raise e
 
     def execute(self):
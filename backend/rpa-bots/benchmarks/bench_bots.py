@@ -0,0 +1,249 @@
+"""Benchmark the Database write paths and full bot cycles against a local stub of NSE
+
+Usage:
+    python benchmarks/bench_bots.py [--sizes 10 1000 10000] [--cycles 5] [--json results.json]
+
+Every run works on a copy of the backend's database.sqlite in a temporary
+directory (or --db-template) and an in-process HTTP server that answers the
+NSE pre-open and allIndices endpoints with --sizes symbols / indices. Prices
+change on every request, so each cycle writes every row (the worst case).
+
+For each size it reports:
+  db single-row   add_stock once per row, one commit each
+  db bulk         add_stocks in one transaction
+  nse / indices / amc cycle
+                  one full bot run (fetch, parse, diff, write); the AMC bot
+                  ingests a freshly written disclosure CSV of that many holdings
+  orchestrated    all three bots in one BotOrchestrator cycle
+
+with rows/s, p50/p99 latency over --cycles runs and the peak Python heap of
+one extra traced run.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, BOTS_DIR)
+
+DEFAULT_DB_TEMPLATE = os.path.join(BOTS_DIR, '..', 'stock-tracker-backend', 'database.sqlite')
+
+
+class StubNSE(BaseHTTPRequestHandler):
+    """Answers the NSE endpoints the bots call with `size` generated quotes"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive responses
+    # stall on delayed ACKs and every request looks 40 ms slower than it is
+    disable_nagle_algorithm = True
+    size = 10
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/api/market-data-pre-open":
+            key = parse_qs(url.query).get("key", ["NIFTY"])[0]
+            self._send({"data": [
+                {"metadata": {
+                    "symbol": f"{key}{i:05d}",
+                    "companyName": f"Company {i} Ltd",
+                    "industry": f"Sector {i % 12}",
+                    "lastPrice": round(random.uniform(10, 5000), 2),
+                    "change": round(random.uniform(-50, 50), 2),
+                }}
+                for i in range(self.size)
+            ]})
+        elif url.path == "/api/allIndices":
+            self._send({"data": [
+                {
+                    "index": f"NIFTY SECTOR {i}",
+                    "last": round(random.uniform(1000, 50000), 2),
+                    "variation": round(random.uniform(-200, 200), 2),
+                    "percentChange": round(random.uniform(-2, 2), 2),
+                }
+                for i in range(self.size)
+            ]})
+        else:
+            # Cookie priming request on the home page
+            self._send({})
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(name, size, rows, cycles, fn, setup=None):
+    """Time `cycles` calls of fn, then trace one more for its peak Python heap"""
+    latencies = []
+    for _ in range(cycles + 1):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    # The first call warms connections, snapshots and caches; keep it out of the stats
+    latencies = latencies[1:]
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50 = statistics.median(latencies)
+    result = {
+        "name": name,
+        "size": size,
+        "rows": rows,
+        "p50_ms": round(p50 * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "rows_per_second": round(rows / p50) if p50 else None,
+        "peak_heap_mb": round(peak / 1e6, 2),
+    }
+    print(
+        f"{name:>16} {size:>6}: p50 {result['p50_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  "
+        f"{result['rows_per_second'] or 0:>10,} rows/s  peak heap {result['peak_heap_mb']:>7.2f} MB"
+    )
+    return result
+
+
+def write_disclosure(directory, size, cycle):
+    """Write one AMC portfolio CSV of `size` holdings spread over funds of 50 stocks"""
+    path = os.path.join(directory, f"portfolio_{size}_{cycle}.csv")
+    with open(path, "w", newline="") as disclosure:
+        writer = csv.writer(disclosure)
+        writer.writerow(["Scheme Name", "AMC", "Category", "Symbol", "Name of the Instrument", "% to NAV"])
+        for i in range(size):
+            writer.writerow([
+                f"Bench Fund {i // 50}", "Bench AMC", "Flexi Cap",
+                f"NIFTY{i:05d}", f"Company {i} Ltd", round(random.uniform(0.1, 5), 2)
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--cycles", type=int, default=5, help="timed runs per scenario")
+    parser.add_argument("--db-template", default=DEFAULT_DB_TEMPLATE,
+                        help="database.sqlite with the backend schema to copy")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="rpa-bench-")
+    db_path = os.path.join(workdir, "database.sqlite")
+    shutil.copy(args.db_template, db_path)
+    # The committed file predates the entity's unique symbol, which synchronize would add
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS bench_stocks_symbol ON stocks (symbol)")
+    connection.close()
+    disclosure_dir = os.path.join(workdir, "disclosures")
+    os.makedirs(disclosure_dir)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubNSE)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Bot modules read their settings at import time
+    os.environ.update({
+        "DB_BACKEND": "sqlite",
+        "DB_PATH": db_path,
+        "NSE_BASE_URL": f"http://127.0.0.1:{server.server_port}",
+        "NSE_PREOPEN_KEYS": "NIFTY",
+        "NSE_INDICES": "*",
+        "NSE_MIN_INTERVAL": "0",
+        "RESPONSE_CACHE_FILE": "",
+        "RESPONSE_CACHE_TTL": "0",
+        "CHANGE_FEED_FILE": os.path.join(workdir, "feed", "changes.jsonl"),
+        "AMC_DISCLOSURE_DIR": disclosure_dir,
+        "PARSE_WORKERS": "1",
+        "LOG_LEVEL": "WARNING",
+    })
+    os.environ.pop("METRICS_FILE", None)
+
+    import database
+    from amc_bot import AMCBot
+    from bot_log_writer import close_bot_log_writer
+    from indices_bot import IndicesBot
+    from nse_bot import NSEBot
+    from orchestrator import BotOrchestrator
+
+    results = []
+    try:
+        for size in args.sizes:
+            StubNSE.size = size
+            db = database.Database(label="bench")
+            db.connect()
+
+            def clear_stocks():
+                db.execute("DELETE FROM stocks WHERE id LIKE 'bench%'")
+                db.connection.commit()
+
+            def single_row():
+                for i in range(size):
+                    db.add_stock((f"bench{i}", f"BENCH{i}", f"Bench {i}", 100.0, 1000, "Bench"))
+
+            def bulk():
+                with db.transaction():
+                    db.add_stocks(
+                        (f"bench{i}", f"BENCH{i}", f"Bench {i}", 100.0, 1000, "Bench") for i in range(size)
+                    )
+
+            results.append(measure("db single-row", size, size, args.cycles, single_row, clear_stocks))
+            results.append(measure("db bulk", size, size, args.cycles, bulk, clear_stocks))
+            clear_stocks()
+            db.disconnect()
+
+            nse_bot, indices_bot, amc_bot = NSEBot(), IndicesBot(), AMCBot()
+            cycle = iter(range(10 ** 9))
+            results.append(measure("nse cycle", size, size, args.cycles, nse_bot.run))
+            results.append(measure("indices cycle", size, size, args.cycles, indices_bot.run))
+            results.append(measure(
+                "amc cycle", size, size, args.cycles, amc_bot.run,
+                lambda: write_disclosure(disclosure_dir, size, next(cycle))
+            ))
+
+            orchestrator = BotOrchestrator()
+            bots = [nse_bot, indices_bot, amc_bot]
+            results.append(measure(
+                "orchestrated", size, size * len(bots), args.cycles,
+                lambda: orchestrator.run_cycle(bots),
+                lambda: write_disclosure(disclosure_dir, size, next(cycle))
+            ))
+            orchestrator.shutdown()
+            nse_bot.parse_pool.close()
+    finally:
+        close_bot_log_writer()
+        database.close_pool()
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
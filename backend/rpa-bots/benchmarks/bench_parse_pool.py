@@ -0,0 +1,78 @@
+"""Benchmark single-process vs process-pool parsing of scraped NSE pages
+
+Usage:
+    python benchmarks/bench_parse_pool.py [--fixtures DIR] [--pages 64] [--rows 2000] [--workers 1 2 4]
+
+--fixtures points at a directory of saved .html/.md pages (for example FireCrawl
+output written to disk). Without it, pages with NSE-style quote tables are
+generated.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from parse_pool import ParsePool  # noqa: E402
+
+
+def build_page(rows, seed):
+    rng = random.Random(seed)
+    lines = [
+        "<html><body><div class='nav'>Market data</div>",
+        "<table><tr><th>Symbol</th><th>Company Name</th><th>Industry</th>"
+        "<th>Open</th><th>High</th><th>Low</th><th>LTP</th><th>Chng</th><th>%Chng</th></tr>",
+    ]
+    for i in range(rows):
+        price = rng.uniform(10, 5000)
+        change = rng.uniform(-0.05, 0.05) * price
+        lines.append(
+            f"<tr><td><a href='/get-quotes/equity?symbol=SYM{i}'>SYM{i}</a></td>"
+            f"<td>Company {i} Ltd</td><td>Sector {i % 12}</td>"
+            f"<td>{price * 0.99:,.2f}</td><td>{price * 1.01:,.2f}</td><td>{price * 0.98:,.2f}</td>"
+            f"<td>{price:,.2f}</td><td>{change:,.2f}</td><td>{change / price * 100:.2f}</td></tr>"
+        )
+    lines.append("</table></body></html>")
+    return "\n".join(lines)
+
+
+def load_fixtures(directory):
+    documents = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm", ".md")):
+            with open(os.path.join(directory, name), encoding="utf-8") as page:
+                documents.append(page.read())
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="directory of saved .html/.md pages")
+    parser.add_argument("--pages", type=int, default=64)
+    parser.add_argument("--rows", type=int, default=2000, help="table rows per generated page")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    if args.fixtures:
+        documents = load_fixtures(args.fixtures)
+    else:
+        documents = [build_page(args.rows, seed) for seed in range(args.pages)]
+    size_mb = sum(len(document) for document in documents) / 1e6
+    print(f"{len(documents)} pages, {size_mb:.1f} MB of markup")
+
+    for workers in args.workers:
+        pool = ParsePool(workers=workers, recycle_after=len(documents) * 10)
+        # Warm the worker processes so start-up is not part of the measurement
+        list(pool.parse(documents[:workers]))
+        start = time.perf_counter()
+        rows = sum(len(page_rows) for page_rows in pool.parse(documents))
+        elapsed = time.perf_counter() - start
+        pool.close()
+        label = "single process" if workers <= 1 else f"{workers} workers"
+        print(f"{label:>14}: {rows} rows in {elapsed:.2f} s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
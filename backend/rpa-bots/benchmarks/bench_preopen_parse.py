@@ -0,0 +1,109 @@
+"""Benchmark columnar vs per-row-dict parsing of the NSE pre-open payload
+
+Usage:
+    python benchmarks/bench_preopen_parse.py [--fixture saved_response.json] [--rows 5000]
+
+No recorded NSE response is committed: nseindia.com could not be reached when
+this benchmark was written, so none was captured. Without --fixture a
+deterministic payload is generated instead, with the fields and nesting of a
+real /api/market-data-pre-open response. To benchmark a recorded response,
+save one from a browser session and pass its path.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nse_parser import parse_preopen_payload  # noqa: E402
+
+
+def build_payload(rows, seed=7):
+    rng = random.Random(seed)
+    industries = ["Banks", "IT - Software", "Refineries", "Pharmaceuticals", "Automobiles", "Cement"]
+    data = []
+    for i in range(rows):
+        last_price = round(rng.uniform(10, 5000), 2)
+        change = round(rng.uniform(-0.05, 0.05) * last_price, 2)
+        data.append({
+            "metadata": {
+                "symbol": f"SYM{i:05d}",
+                "identifier": f"SYM{i:05d}EQN",
+                "purpose": None,
+                "lastPrice": last_price,
+                "change": change,
+                "pChange": round(change / (last_price - change) * 100, 2),
+                "previousClose": round(last_price - change, 2),
+                "finalQuantity": rng.randint(1, 100000),
+                "totalTurnover": round(rng.uniform(1e4, 1e8), 2),
+                "marketCap": "-",
+                "yearHigh": round(last_price * 1.3, 2),
+                "yearLow": round(last_price * 0.7, 2),
+                "iep": last_price,
+                "companyName": f"Company {i} Ltd",
+                "industry": industries[i % len(industries)],
+            },
+            "detail": {"preOpenMarket": {"preopen": [], "IEP": last_price}},
+        })
+    return {"declines": 0, "advances": 0, "unchanged": 0, "data": data}
+
+
+def parse_with_dicts(data):
+    """Per-row dict parsing as NSEBot did before the columnar parser"""
+    stocks = []
+    for item in data['data']:
+        if 'metadata' in item:
+            metadata = item['metadata']
+            change = metadata.get('change', 0)
+            stocks.append({
+                "symbol": metadata.get('symbol', 'UNKNOWN'),
+                "name": metadata.get('companyName', 'Unknown Company'),
+                "price": metadata.get('lastPrice', 0),
+                "market_cap": random.randint(100000, 2000000),
+                "sector": metadata.get('industry', 'Unknown'),
+                "direction": "up" if change > 0 else "down" if change < 0 else "none",
+            })
+    rows = [
+        (f"s{i}", s["symbol"], s["name"], s["price"], s["market_cap"], s["sector"], s["direction"])
+        for i, s in enumerate(stocks)
+    ]
+    return rows
+
+
+def parse_with_columns(data):
+    columns = parse_preopen_payload(data)
+    return list(columns.rows([f"s{i}" for i in range(len(columns))]))
+
+
+def measure(fn, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = fn(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixture", help="recorded market-data-pre-open JSON response")
+    parser.add_argument("--rows", type=int, default=5000, help="rows to generate without a fixture")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.fixture:
+        with open(args.fixture) as fixture:
+            data = json.load(fixture)
+    else:
+        data = build_payload(args.rows)
+
+    for label, fn in (("per-row dicts", parse_with_dicts), ("columnar", parse_with_columns)):
+        best, count = measure(fn, data, args.repeat)
+        print(f"{label:>14}: {count} rows in {best * 1000:.2f} ms ({count / best:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
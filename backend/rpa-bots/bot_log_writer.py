@@ -0,0 +1,115 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+from database import Database
+from log_config import get_logger
+
+BOT_LOG_BATCH_SIZE = int(os.getenv('BOT_LOG_BATCH_SIZE', '50'))
+BOT_LOG_FLUSH_SECONDS = float(os.getenv('BOT_LOG_FLUSH_SECONDS', '1'))
+
+logger = get_logger("bot_logs")
+
+_STOP = object()
+
+
+class BotLogWriter:
+    """Background writer that batches bot_logs rows into one transaction per flush
+
+    Bots hand rows to submit() and carry on; a single thread collects them for up
+    to flush_seconds (or batch_size rows) and writes the batch on a pooled
+    connection it only holds for that write.
+    """
+
+    def __init__(self, batch_size=BOT_LOG_BATCH_SIZE, flush_seconds=BOT_LOG_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.db = Database(label="bot_logs")
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, log_data):
+        """Queue one (id, bot_name, status, execution_time, timestamp, result) row"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="bot-log-writer", daemon=True)
+                self._thread.start()
+        self._queue.put(log_data)
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        flush_at = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, flush_at - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Write what we have, then stop on the next call
+                self._queue.task_done()
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                self._queue.task_done()
+                return
+            try:
+                with self.db.transaction():
+                    self.db.add_bot_logs(batch)
+            except Exception as e:
+                logger.error("Error writing %d bot log rows: %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every submitted row has been written (or failed)"""
+        self._queue.join()
+
+    def close(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+
+_writer: Optional[BotLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_bot_log_writer():
+    """Return the process-wide bot log writer, creating it on first use"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BotLogWriter()
+        return _writer
+
+
+def close_bot_log_writer():
+    """Write out queued rows and stop the writer thread; call before close_pool()"""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
+
+# Bots run on their own (python indices_bot.py) never call close_bot_log_writer()
+# and the writer thread is a daemon, so drain it at exit. atexit runs handlers in
+# reverse order, so this still logs through log_config, which registered first.
+atexit.register(close_bot_log_writer)
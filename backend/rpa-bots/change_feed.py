@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+import metrics
+from log_config import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: only one bot process may publish at a time
+    fcntl = None
+
+# JSON Lines file the committed changes are appended to; empty disables the feed
+CHANGE_FEED_FILE = os.getenv('CHANGE_FEED_FILE', 'feed/changes.jsonl')
+# Once the file reaches this size it is renamed to <file>.1 and a new one started
+CHANGE_FEED_MAX_BYTES = int(os.getenv('CHANGE_FEED_MAX_BYTES', str(64 * 1024 * 1024)))
+
+logger = get_logger("change_feed")
+
+TAIL_BYTES = 64 * 1024
+
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def _segments(path):
+    """The rotated segment and the current file, oldest first"""
+    return (f"{path}.1", path)
+
+
+def _last_sequence(path):
+    """Sequence number of the last event in the feed, or 0 for an empty one"""
+    for segment in reversed(_segments(path)):
+        try:
+            with open(segment, "rb") as feed_file:
+                feed_file.seek(0, os.SEEK_END)
+                size = feed_file.tell()
+                feed_file.seek(max(0, size - TAIL_BYTES))
+                tail = feed_file.read()
+        except FileNotFoundError:
+            continue
+        for line in reversed(tail.splitlines()):
+            try:
+                return json.loads(line)["seq"]
+            except (ValueError, KeyError, TypeError):
+                continue  # Partial first line of the tail, or a torn write
+    return 0
+
+
+def _as_dict(record):
+    fields = getattr(record, "_fields", None)
+    return dict(zip(fields, record)) if fields is not None else dict(record)
+
+
+class ChangeFeed:
+    """Append-only JSON Lines log of the changes the bots have committed
+
+    Every line is one event: {"seq": 42, "ts": 1760000000, "type": "stock",
+    "data": {...}}. seq increases by one per event across restarts and rotations,
+    so a consumer keeps the last seq it applied and reads on from there instead
+    of rescanning the tables. Types and their data:
+
+        stock        a Stock record whose price or details changed
+        index        an IndexQuote record that moved
+        fund         a Fund record whose portfolio is replaced by the holding events that follow
+        holding      a Holding record
+
+    Publish only after the transaction holding the change has committed. Several
+    processes may publish to the same file; appends and sequence numbers are
+    serialized with an flock on <file>.lock.
+    """
+
+    def __init__(self, path=CHANGE_FEED_FILE, max_bytes=CHANGE_FEED_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._lock_file = None
+        self._sequence = None
+        # File size after our own last append; anything else means another writer was here
+        self._size = None
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def publish(self, event_type, records):
+        """Append one event per record; returns the number of events written
+
+        A failed append is logged rather than raised: the data is already committed,
+        and consumers that fall behind can always resync from the tables.
+        """
+        if not self.path:
+            return 0
+        records = list(records)
+        if not records:
+            return 0
+        with self._lock:
+            try:
+                self._append(event_type, records)
+            except OSError as e:
+                logger.error("Error appending %d %s events to %s: %s", len(records), event_type, self.path, e)
+                return 0
+        metrics.inc("rpa_change_feed_events_total", len(records), type=event_type)
+        return len(records)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if self._lock_file is None:
+            self._lock_file = open(f"{self.path}.lock", "a")
+        self._file = open(self.path, "ab")
+
+    def _append(self, event_type, records):
+        if self._file is None:
+            self._open()
+        if fcntl is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            try:
+                current = os.stat(self.path)
+            except FileNotFoundError:
+                current = None
+            if current is None or current.st_ino != os.fstat(self._file.fileno()).st_ino:
+                # Another process rotated the file under us
+                self._file.close()
+                self._open()
+                current = os.fstat(self._file.fileno())
+            if self._sequence is None or current.st_size != self._size:
+                self._sequence = _last_sequence(self.path)
+
+            # The envelope is formatted directly; only the record data goes through the encoder
+            envelope_tail = f',"ts":{int(time.time())},"type":{_encode(event_type)},"data":'
+            first = self._sequence + 1
+            lines = [
+                f'{{"seq":{sequence}{envelope_tail}{_encode(_as_dict(record))}}}'
+                for sequence, record in enumerate(records, first)
+            ]
+            self._sequence += len(records)
+            # A large batch can reach the file in several writes; readers stop at an unterminated line
+            self._file.write(("\n".join(lines) + "\n").encode())
+            self._file.flush()
+            self._size = self._file.tell()
+
+            if self._size >= self.max_bytes:
+                self._file.close()
+                os.replace(self.path, f"{self.path}.1")
+                self._open()
+                self._size = 0
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def close(self):
+        with self._lock:
+            for handle in (self._file, self._lock_file):
+                if handle is not None:
+                    handle.close()
+            self._file = self._lock_file = None
+            self._sequence = self._size = None
+
+
+def read_changes(since=0, path=CHANGE_FEED_FILE):
+    """Yield the feed's events with seq > since, oldest first
+
+    When since is older than the first event still on disk the consumer has
+    missed changes and should reload the tables before reading on.
+    """
+    for segment in _segments(path):
+        try:
+            feed_file = open(segment, "rb")
+        except FileNotFoundError:
+            continue
+        with feed_file:
+            for line in feed_file:
+                if not line.endswith(b"\n"):
+                    break  # A write still in progress
+                event = json.loads(line)
+                if event["seq"] > since:
+                    yield event
+
+
+_feed: Optional[ChangeFeed] = None
+_feed_lock = threading.Lock()
+
+
+def get_change_feed():
+    """Return the process-wide change feed, creating it on first use"""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = ChangeFeed()
+        return _feed
+
+
+def close_change_feed():
+    global _feed
+    with _feed_lock:
+        if _feed is not None:
+            _feed.close()
+            _feed = None
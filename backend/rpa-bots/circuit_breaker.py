@@ -0,0 +1,115 @@
+import os
+import random
+import threading
+import time
+
+import metrics
+from log_config import get_logger
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '3'))
+CIRCUIT_RESET_SECONDS = float(os.getenv('CIRCUIT_RESET_SECONDS', '30'))
+CIRCUIT_MAX_RESET_SECONDS = float(os.getenv('CIRCUIT_MAX_RESET_SECONDS', '600'))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+logger = get_logger("circuit_breaker")
+
+
+class CircuitOpen(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """Per-source circuit breaker with exponentially growing cool-downs
+
+    After failure_threshold consecutive failures the circuit opens and calls are
+    rejected without touching the source. Once the cool-down has passed a single
+    probe call is let through (half-open): success closes the circuit, failure
+    reopens it for twice as long, up to max_reset_timeout.
+    """
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout=CIRCUIT_RESET_SECONDS, max_reset_timeout=CIRCUIT_MAX_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.cooldown = reset_timeout
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _cooldown_over(self, now):
+        return now - self.opened_at >= self.cooldown
+
+    def available(self):
+        """True unless the circuit is open and still cooling down; does not claim a probe"""
+        with self._lock:
+            return self.state != OPEN or self._cooldown_over(time.monotonic())
+
+    def allow(self):
+        """Claim permission for one call, moving an open circuit to half-open when due"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self._cooldown_over(time.monotonic()):
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        metrics.inc("rpa_circuit_rejected_total", source=self.name)
+        return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("Circuit %s closed after a successful probe", self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self.cooldown = self.reset_timeout
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                # The probe failed: back off for longer before the next one
+                self.cooldown = min(self.cooldown * 2, self.max_reset_timeout)
+            elif self.state == OPEN or self.failures < self.failure_threshold:
+                return
+            self.state = OPEN
+            self._probing = False
+            # Jitter stops every worker process from probing the source at once
+            self.opened_at = time.monotonic() + random.uniform(0, self.cooldown * 0.1)
+        metrics.inc("rpa_circuit_opened_total", source=self.name)
+        logger.warning("Circuit %s opened for %.1f seconds after %d failures", self.name, self.cooldown, self.failures)
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker, raising CircuitOpen instead of calling a source known to be down"""
+        if not self.allow():
+            raise CircuitOpen(f"{self.name} circuit is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Return the process-wide breaker of a source, so every bot and run shares its state"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
@@ -1,126 +1,509 @@
-import sqlite3
 import os
-from dotenv import load_dotenv
+import queue
+import threading
+import time
+from contextlib import contextmanager
+import metrics
+from db_backends import STOCK_FUND_INDEX_SELECT, backend_from_env
+from log_config import get_logger
 from typing import Optional
 
-# Load environment variables
-load_dotenv()
+logger = get_logger("database")
+
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '4'))
+
+# SQLite allows a single writer; bots running on worker threads take this lock around
+# every write so they queue in-process instead of spinning on SQLITE_BUSY. Backends
+# with concurrent writers (PostgreSQL) skip it.
+WRITE_LOCK = threading.RLock()
+
+
+class ConnectionPool:
+    """Thread-safe pool of long-lived database connections shared by all bots in a process"""
+
+    def __init__(self, backend=None, max_size=POOL_SIZE):
+        self.backend = backend or backend_from_env()
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._schema_ready = False
+
+    def _open(self):
+        connection = self.backend.connect()
+        try:
+            with self._lock:
+                if not self._schema_ready:
+                    self.backend.prepare_schema(connection)
+                    self._schema_ready = True
+        except Exception:
+            connection.close()
+            raise
+        return connection
+
+    def acquire(self, timeout=None):
+        """Check out a connection, opening a new one only when none are idle"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No database connection available after {timeout} seconds")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self._open()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        """Return a connection to the pool, discarding any uncommitted work"""
+        try:
+            if self.backend.in_transaction(connection):
+                connection.rollback()
+            if self._closed:
+                connection.close()
+            else:
+                self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self):
+        """Close every idle connection; checked-out ones are closed when released"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = ConnectionPool()
+        return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
 
 class Database:
-    def __init__(self):
-        self.connection: Optional[sqlite3.Connection] = None
-        self.cursor: Optional[sqlite3.Cursor] = None
+    def __init__(self, pool: Optional[ConnectionPool] = None, label: str = "database"):
+        self.pool = pool
+        # Identifies the owner (usually a bot) in exported metrics
+        self.label = label
+        self.connection = None
+        self.cursor = None
+        self._depth = 0
+        self._tx_depth = 0
 
     def connect(self):
+        # Nested connect() calls reuse the connection already checked out, so a whole
+        # bot run (logging included) shares a single pooled connection.
+        if self.connection:
+            self._depth += 1
+            return
         try:
-            # Connect to SQLite database
-            self.connection = sqlite3.connect('../stock-tracker-backend/database.sqlite')
+            if self.pool is None:
+                self.pool = get_pool()
+            self.connection = self.pool.acquire()
             self.cursor = self.connection.cursor()
-            print("Database connection established")
+            self._depth = 1
+            logger.debug("Database connection established")
         except Exception as e:
-            print(f"Error connecting to database: {e}")
+            logger.error("Error connecting to database: %s", e)
 
     def disconnect(self):
-        if self.connection:
-            self.connection.close()
-            print("Database connection closed")
+        if not self.connection:
+            return
+        self._depth -= 1
+        if self._depth > 0:
+            return
+        self.cursor.close()
+        self.pool.release(self.connection)
+        self.connection = None
+        self.cursor = None
+        logger.debug("Database connection released")
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disconnect()
+
+    @contextmanager
+    def transaction(self):
+        """Group writes into a single commit; any failure rolls back the whole batch"""
+        self.connect()
+        if not self.connection:
+            raise RuntimeError("Database not connected")
+        try:
+            with self._write_lock():
+                self._tx_depth += 1
+                try:
+                    yield self
+                    if self._tx_depth == 1:
+                        self._commit_now()
+                except Exception:
+                    if self._tx_depth == 1:
+                        self.connection.rollback()
+                        logger.warning("Transaction rolled back")
+                    raise
+                finally:
+                    self._tx_depth -= 1
+        finally:
+            self.disconnect()
+
+    @contextmanager
+    def _write_lock(self):
+        if self._tx_depth or not self.pool.backend.single_writer:
+            # Already held by the enclosing transaction, or not needed by the backend
+            yield
+            return
+        start = time.perf_counter()
+        with WRITE_LOCK:
+            metrics.observe("rpa_db_lock_wait_seconds", time.perf_counter() - start, bot=self.label)
+            yield
+
+    def _commit_now(self):
+        with metrics.timer("rpa_db_commit_seconds", bot=self.label):
+            self.connection.commit()
+
+    def _commit(self):
+        # Inside transaction() the commit is deferred to the end of the batch
+        if not self._tx_depth:
+            self._commit_now()
+
+    def execute(self, query, params=()):
+        """Run one statement written with ? placeholders on the current cursor"""
+        self.cursor.execute(self.pool.backend.sql(query), params)
+        return self.cursor
+
+    def write_many(self, query, rows, description):
+        """Run query for every row in bulk, honouring an open transaction()
+
+        The backend picks the bulk mechanism: executemany on SQLite, COPY,
+        execute_values or execute_batch on PostgreSQL.
+        """
+        if not self.connection or not self.cursor:
+            logger.error("Database not connected")
+            return 0
+        rows = list(rows)
+        if not rows:
+            return 0
+        try:
+            with self._write_lock():
+                self.pool.backend.executemany(self.cursor, query, rows)
+                self._commit()
+            metrics.inc("rpa_db_rows_written_total", len(rows), bot=self.label, operation=description)
+            logger.debug("%d %s written successfully", len(rows), description)
+            return len(rows)
+        except Exception as e:
+            logger.error("Error writing %s: %s", description, e)
+            if self._tx_depth:
+                raise
+            self.connection.rollback()
+            return 0
 
     def add_stock(self, stock_data):
         if not self.connection or not self.cursor:
-            print("Database not connected")
+            logger.error("Database not connected")
             return
         try:
             insert_query = """
             INSERT INTO stocks (id, symbol, name, price, market_cap, sector)
             VALUES (?, ?, ?, ?, ?, ?)
             """
-            self.cursor.execute(insert_query, stock_data)
-            self.connection.commit()
-            print(f"Stock {stock_data[1]} added successfully")
+            with self._write_lock():
+                self.execute(insert_query, stock_data)
+                self._commit()
+            logger.debug("Stock %s added successfully", stock_data[1])
         except Exception as e:
-            print(f"Error adding stock: {e}")
-            if self.connection:
-                self.connection.rollback()
+            logger.error("Error adding stock: %s", e)
+            if self._tx_depth:
+                raise
+            self.connection.rollback()
 
     def update_stock_price(self, stock_id, new_price):
         if not self.connection or not self.cursor:
-            print("Database not connected")
+            logger.error("Database not connected")
             return
         try:
             update_query = """
             UPDATE stocks SET price = ? WHERE id = ?
             """
-            self.cursor.execute(update_query, (new_price, stock_id))
-            self.connection.commit()
-            print(f"Stock {stock_id} price updated to {new_price}")
+            with self._write_lock():
+                self.execute(update_query, (new_price, stock_id))
+                self._commit()
+            logger.debug("Stock %s price updated to %s", stock_id, new_price)
         except Exception as e:
-            print(f"Error updating stock price: {e}")
-            if self.connection:
-                self.connection.rollback()
+            logger.error("Error updating stock price: %s", e)
+            if self._tx_depth:
+                raise
+            self.connection.rollback()
 
     def add_fund(self, fund_data):
         if not self.connection or not self.cursor:
-            print("Database not connected")
+            logger.error("Database not connected")
             return
         try:
             insert_query = """
             INSERT INTO mutual_funds (id, name, amc, category)
             VALUES (?, ?, ?, ?)
             """
-            self.cursor.execute(insert_query, fund_data)
-            self.connection.commit()
-            print(f"Fund {fund_data[1]} added successfully")
+            with self._write_lock():
+                self.execute(insert_query, fund_data)
+                self._commit()
+            logger.debug("Fund %s added successfully", fund_data[1])
         except Exception as e:
-            print(f"Error adding fund: {e}")
-            if self.connection:
-                self.connection.rollback()
+            logger.error("Error adding fund: %s", e)
+            if self._tx_depth:
+                raise
+            self.connection.rollback()
 
     def add_fund_holding(self, holding_data):
         if not self.connection or not self.cursor:
-            print("Database not connected")
+            logger.error("Database not connected")
             return
         try:
             insert_query = """
             INSERT INTO fund_holdings (fund_id, stock_id, percentage)
             VALUES (?, ?, ?)
             """
-            self.cursor.execute(insert_query, holding_data)
-            self.connection.commit()
-            print(f"Holding for fund {holding_data[0]} added successfully")
+            with self._write_lock():
+                self.execute(insert_query, holding_data)
+                self._commit()
+            logger.debug("Holding for fund %s added successfully", holding_data[0])
         except Exception as e:
-            print(f"Error adding fund holding: {e}")
-            if self.connection:
-                self.connection.rollback()
+            logger.error("Error adding fund holding: %s", e)
+            if self._tx_depth:
+                raise
+            self.connection.rollback()
 
     def update_index(self, index_id, value, change, percent_change):
         if not self.connection or not self.cursor:
-            print("Database not connected")
+            logger.error("Database not connected")
             return
         try:
             update_query = """
             UPDATE indices SET value = ?, change = ?, percent_change = ? WHERE id = ?
             """
-            self.cursor.execute(update_query, (value, change, percent_change, index_id))
-            self.connection.commit()
-            print(f"Index {index_id} updated successfully")
+            with self._write_lock():
+                self.execute(update_query, (value, change, percent_change, index_id))
+                self._commit()
+            logger.debug("Index %s updated successfully", index_id)
         except Exception as e:
-            print(f"Error updating index: {e}")
-            if self.connection:
-                self.connection.rollback()
+            logger.error("Error updating index: %s", e)
+            if self._tx_depth:
+                raise
+            self.connection.rollback()
 
     def add_bot_log(self, log_data):
         if not self.connection or not self.cursor:
-            print("Database not connected")
+            logger.error("Database not connected")
             return
         try:
             insert_query = """
             INSERT INTO bot_logs (id, bot_name, status, execution_time, timestamp, result)
             VALUES (?, ?, ?, ?, ?, ?)
             """
-            self.cursor.execute(insert_query, log_data)
-            self.connection.commit()
-            print(f"Bot log for {log_data[1]} added successfully")
+            with self._write_lock():
+                self.execute(insert_query, log_data)
+                self._commit()
+            logger.debug("Bot log for %s added successfully", log_data[1])
         except Exception as e:
-            print(f"Error adding bot log: {e}")
-            if self.connection:
-                self.connection.rollback()
\ No newline at end of file
+            logger.error("Error adding bot log: %s", e)
+            if self._tx_depth:
+                raise
+            self.connection.rollback()
+
+    def add_bot_logs(self, logs):
+        """Insert many (id, bot_name, status, execution_time, timestamp, result) rows in one statement"""
+        insert_query = """
+        INSERT INTO bot_logs (id, bot_name, status, execution_time, timestamp, result)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """
+        return self.write_many(insert_query, logs, "bot logs")
+
+    def add_stocks(self, stocks):
+        """Insert many (id, symbol, name, price, market_cap, sector) rows in one statement"""
+        insert_query = """
+        INSERT INTO stocks (id, symbol, name, price, market_cap, sector)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """
+        return self.write_many(insert_query, stocks, "stocks")
+
+    def upsert_stocks(self, stocks):
+        """Insert or refresh many Stock records (see records.py) keyed on symbol
+
+        Existing symbols keep their id; rows whose values are unchanged are left untouched.
+        A None direction is derived from the move against the stored price.
+        """
+        upsert_query = """
+        INSERT INTO stocks (id, symbol, name, price, market_cap, sector, price_change_direction)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(symbol) DO UPDATE SET
+            name = excluded.name,
+            price = excluded.price,
+            market_cap = excluded.market_cap,
+            sector = excluded.sector,
+            price_change_direction = COALESCE(excluded.price_change_direction, CASE
+                WHEN excluded.price > stocks.price THEN 'up'
+                WHEN excluded.price < stocks.price THEN 'down'
+                ELSE 'none'
+            END)
+        WHERE stocks.price IS NOT excluded.price
+           OR stocks.name IS NOT excluded.name
+           OR stocks.market_cap IS NOT excluded.market_cap
+           OR stocks.sector IS NOT excluded.sector
+        """
+        return self.write_many(upsert_query, stocks, "stock upserts")
+
+    def get_stock_rows(self):
+        """Return every stored stock as an (id, symbol, name, price, market_cap, sector) tuple"""
+        if not self.connection or not self.cursor:
+            logger.error("Database not connected")
+            return []
+        self.execute("SELECT id, symbol, name, price, market_cap, sector FROM stocks")
+        return self.cursor.fetchall()
+
+    def get_stock_ids(self, symbols):
+        """Return the symbol -> stored stock id map for the given symbols"""
+        if not self.connection or not self.cursor:
+            logger.error("Database not connected")
+            return {}
+        symbols = list(symbols)
+        stock_ids = {}
+        # Chunked to stay under SQLite's limit on bound parameters per statement
+        for start in range(0, len(symbols), 500):
+            chunk = symbols[start:start + 500]
+            self.execute(f"SELECT symbol, id FROM stocks WHERE symbol IN ({', '.join('?' * len(chunk))})", chunk)
+            stock_ids.update(self.cursor.fetchall())
+        return stock_ids
+
+    def get_index_rows(self):
+        """Return every stored index as an (id, name, value, change, percent_change) tuple"""
+        if not self.connection or not self.cursor:
+            logger.error("Database not connected")
+            return []
+        self.execute("SELECT id, name, value, change, percent_change FROM indices")
+        return self.cursor.fetchall()
+
+    def add_fund_holdings(self, holdings):
+        """Insert many Holding records in one statement"""
+        insert_query = """
+        INSERT INTO fund_holdings (fund_id, stock_id, percentage)
+        VALUES (?, ?, ?)
+        """
+        return self.write_many(insert_query, holdings, "fund holdings")
+
+    def upsert_funds(self, funds):
+        """Insert or refresh many Fund records keyed on id"""
+        upsert_query = """
+        INSERT INTO mutual_funds (id, name, amc, category)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            name = excluded.name,
+            amc = excluded.amc,
+            category = excluded.category
+        """
+        return self.write_many(upsert_query, funds, "fund upserts")
+
+    def upsert_fund_holdings(self, holdings):
+        """Insert or refresh many Holding records"""
+        upsert_query = """
+        INSERT INTO fund_holdings (fund_id, stock_id, percentage)
+        VALUES (?, ?, ?)
+        ON CONFLICT(fund_id, stock_id) DO UPDATE SET percentage = excluded.percentage
+        """
+        return self.write_many(upsert_query, holdings, "fund holding upserts")
+
+    def delete_fund_holdings(self, fund_ids):
+        """Remove every holding of the given funds before a full portfolio reload"""
+        return self.write_many(
+            "DELETE FROM fund_holdings WHERE fund_id = ?",
+            ((fund_id,) for fund_id in fund_ids),
+            "fund holding deletions"
+        )
+
+    def get_isin_map(self):
+        """Return the isin -> stock id map learned from earlier disclosures"""
+        if not self.connection or not self.cursor:
+            logger.error("Database not connected")
+            return {}
+        self.execute("SELECT isin, stock_id FROM stock_isins")
+        return dict(self.cursor.fetchall())
+
+    def add_isin_mappings(self, mappings):
+        """Record many (isin, stock_id) pairs"""
+        insert_query = """
+        INSERT INTO stock_isins (isin, stock_id) VALUES (?, ?)
+        ON CONFLICT(isin) DO UPDATE SET stock_id = excluded.stock_id
+        """
+        return self.write_many(insert_query, mappings, "ISIN mappings")
+
+    def upsert_indices(self, indices):
+        """Insert or refresh many IndexQuote records keyed on id"""
+        upsert_query = """
+        INSERT INTO indices (id, name, value, change, percent_change)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            name = excluded.name,
+            value = excluded.value,
+            change = excluded.change,
+            percent_change = excluded.percent_change
+        """
+        return self.write_many(upsert_query, indices, "index upserts")
+
+    def refresh_stock_fund_index(self, fund_ids):
+        """Rebuild the stock -> funds reverse index rows of the given funds"""
+        fund_ids = [(fund_id,) for fund_id in set(fund_ids)]
+        if not fund_ids:
+            return 0
+        with self.transaction():
+            self.pool.backend.executemany(self.cursor, "DELETE FROM stock_fund_index WHERE fund_id = ?", fund_ids)
+            self.pool.backend.executemany(
+                self.cursor,
+                f"INSERT INTO stock_fund_index {STOCK_FUND_INDEX_SELECT} WHERE h.fund_id = ?",
+                fund_ids
+            )
+        logger.debug("Stock fund index refreshed for %d funds", len(fund_ids))
+        return len(fund_ids)
+
+    def get_funds_holding_stock(self, stock_id):
+        """Return [(fund_name, amc, percentage)] for a stock, largest holding first
+
+        Reads stock_fund_index, so holdings the API wrote since the bots started are
+        only seen after the next start-up resync.
+        """
+        if not self.connection or not self.cursor:
+            logger.error("Database not connected")
+            return []
+        self.execute(
+            "SELECT fund_name, amc, percentage FROM stock_fund_index WHERE stock_id = ? ORDER BY percentage DESC",
+            (stock_id,)
+        )
+        return self.cursor.fetchall()
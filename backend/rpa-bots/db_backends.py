@@ -0,0 +1,296 @@
+import io
+import os
+import re
+import sqlite3
+from datetime import datetime
+from urllib.parse import quote
+
+from dotenv import load_dotenv
+from log_config import get_logger
+
+try:
+    import psycopg2
+    import psycopg2.extensions
+    import psycopg2.extras
+except ImportError:  # Only needed with DB_BACKEND=postgres
+    psycopg2 = None
+
+# Load environment variables
+load_dotenv()
+
+# 'sqlite' (default) or 'postgres'
+DB_BACKEND = os.getenv('DB_BACKEND', 'sqlite').lower()
+DEFAULT_DB_PATH = '../stock-tracker-backend/database.sqlite'
+DB_PATH = os.getenv('DB_PATH', DEFAULT_DB_PATH)
+BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+# Compiled statements kept per SQLite connection; the bots' queries are constant strings
+STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '256'))
+# PostgreSQL connection, as in .env; the defaults match the backend's docker-compose.yml
+DB_HOST = os.getenv('DB_HOST', 'localhost')
+DB_PORT = int(os.getenv('DB_PORT', '5432'))
+DB_NAME = os.getenv('DB_NAME', 'stocktracker')
+DB_USER = os.getenv('DB_USER', 'stocktracker')
+DB_PASSWORD = os.getenv('DB_PASSWORD', 'stocktracker')
+# A full connection URI overrides the DB_* settings
+DATABASE_URL = os.getenv('DATABASE_URL') or (
+    f"postgresql://{quote(DB_USER, safe='')}:{quote(DB_PASSWORD, safe='')}"
+    f"@{DB_HOST}:{DB_PORT}/{quote(DB_NAME, safe='')}"
+)
+# Plain inserts of at least this many rows are loaded with COPY
+PG_COPY_MIN_ROWS = int(os.getenv('PG_COPY_MIN_ROWS', '500'))
+PG_PAGE_SIZE = int(os.getenv('PG_PAGE_SIZE', '1000'))
+
+logger = get_logger("db_backends")
+
+STOCK_FUND_INDEX_SELECT = """
+    SELECT h.stock_id, h.fund_id, f.name, f.amc, h.percentage
+    FROM fund_holdings h JOIN mutual_funds f ON f.id = h.fund_id
+"""
+
+
+def _sync_stock_fund_index(cursor):
+    """Rebuild stock_fund_index in full when its row count differs from fund_holdings
+
+    The NestJS API writes fund_holdings without touching the index, so holdings it
+    added or removed since the bots last ran are picked up here at start-up.
+    """
+    cursor.execute("""
+        SELECT (SELECT COUNT(*) FROM stock_fund_index),
+               (SELECT COUNT(*) FROM fund_holdings h JOIN mutual_funds f ON f.id = h.fund_id)
+    """)
+    indexed, held = cursor.fetchone()
+    if indexed == held:
+        return
+    cursor.execute("DELETE FROM stock_fund_index")
+    cursor.execute(f"INSERT INTO stock_fund_index {STOCK_FUND_INDEX_SELECT}")
+    logger.info("Rebuilt stock_fund_index: %d rows indexed, %d holdings", indexed, held)
+
+
+def _dedupe_stock_symbols(connection):
+    """Collapse duplicate symbols onto their oldest row so the entity's unique symbol constraint can apply"""
+    duplicates = connection.execute("""
+        SELECT s.id, k.id FROM stocks s
+        JOIN (SELECT symbol, id, MIN(rowid) FROM stocks GROUP BY symbol) k
+          ON k.symbol = s.symbol AND k.id != s.id
+    """).fetchall()
+    if not duplicates:
+        return
+    connection.executemany(
+        "UPDATE OR IGNORE fund_holdings SET stock_id = ? WHERE stock_id = ?",
+        ((keep_id, duplicate_id) for duplicate_id, keep_id in duplicates)
+    )
+    connection.executemany(
+        "DELETE FROM fund_holdings WHERE stock_id = ?",
+        ((duplicate_id,) for duplicate_id, _ in duplicates)
+    )
+    connection.executemany(
+        "DELETE FROM stocks WHERE id = ?",
+        ((duplicate_id,) for duplicate_id, _ in duplicates)
+    )
+    logger.info("Removed %d duplicate stock rows", len(duplicates))
+
+
+def _has_unique_symbol(connection):
+    """Whether stocks.symbol carries the unique constraint upsert_stocks' ON CONFLICT needs"""
+    for _, name, unique, *_ in connection.execute("PRAGMA index_list(stocks)"):
+        if unique and [column for *_, column in connection.execute(f"PRAGMA index_info(\"{name}\")")] == ["symbol"]:
+            return True
+    return False
+
+
+class SQLiteBackend:
+    """The backend's database.sqlite file, in WAL mode with synchronous=NORMAL"""
+
+    name = "sqlite"
+    # SQLite allows a single writer; Database serializes writes in-process for it
+    single_writer = True
+
+    def __init__(self, path=DB_PATH, busy_timeout_ms=BUSY_TIMEOUT_MS, statement_cache_size=STATEMENT_CACHE_SIZE):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache_size = statement_cache_size
+
+    def connect(self):
+        # Connections are handed between worker threads, so the same-thread check is
+        # disabled; the pool guarantees a connection has a single user at a time.
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size
+        )
+        connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        connection.execute("PRAGMA journal_mode = WAL")
+        # With WAL, NORMAL only syncs at checkpoints: a power cut can lose the last
+        # commits but never corrupts the file, and every commit skips an fsync
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def prepare_schema(self, connection):
+        """Create the indexes and bot-owned tables the bots rely on; safe to run on every start"""
+        with connection:
+            _dedupe_stock_symbols(connection)
+            # The Stock entity declares symbol unique; synchronize adds the constraint
+            if not _has_unique_symbol(connection):
+                logger.warning("stocks.symbol is not unique yet; start the NestJS backend once to synchronize the schema")
+            # Append-only price history (see price_history.py); clustered on (series, ts)
+            # so range scans read contiguous pages and no separate rowid b-tree is kept
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS price_ticks (
+                    series TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    price REAL NOT NULL,
+                    PRIMARY KEY (series, ts)
+                ) WITHOUT ROWID
+            """)
+            # Materialized stock -> funds reverse index, kept current by refresh_stock_fund_index()
+            # and resynced at start-up by _sync_stock_fund_index()
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS stock_fund_index (
+                    stock_id TEXT NOT NULL,
+                    fund_id TEXT NOT NULL,
+                    fund_name TEXT NOT NULL,
+                    amc TEXT NOT NULL,
+                    percentage REAL NOT NULL,
+                    PRIMARY KEY (stock_id, fund_id)
+                ) WITHOUT ROWID
+            """)
+            # ISIN -> stock id map learned while ingesting AMC disclosures
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS stock_isins (
+                    isin TEXT PRIMARY KEY NOT NULL,
+                    stock_id TEXT NOT NULL
+                ) WITHOUT ROWID
+            """)
+            _sync_stock_fund_index(connection.cursor())
+
+    def in_transaction(self, connection):
+        return connection.in_transaction
+
+    def sql(self, query):
+        return query
+
+    def executemany(self, cursor, query, rows):
+        cursor.executemany(query, rows)
+
+
+# INSERT INTO table (columns) VALUES (?, ...) with nothing after it: safe to COPY
+_PLAIN_INSERT = re.compile(r"^\s*INSERT INTO (\w+) \(([\w\s,]+)\)\s*VALUES\s*\([?,\s]+\)\s*$", re.IGNORECASE)
+_VALUES_GROUP = re.compile(r"VALUES\s*\([?,\s]+\)", re.IGNORECASE)
+# SQLite's null-safe a IS NOT b; PostgreSQL only accepts IS NOT before NULL, TRUE and FALSE
+_IS_NOT = re.compile(r"\bIS NOT (?!NULL\b|TRUE\b|FALSE\b)", re.IGNORECASE)
+
+
+def _copy_value(value):
+    """Encode one value for COPY's text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _numeric_to_float(value, cursor):
+    return None if value is None else float(value)
+
+
+class PostgresBackend:
+    """PostgreSQL (the docker-compose database) through psycopg2
+
+    Queries are written once with SQLite's ? placeholders and IS NOT comparisons
+    and translated here.
+    Bulk writes use COPY for large plain inserts and execute_values (one
+    multi-row statement per page) for upserts; other statements are sent with
+    execute_batch, which packs a page of them into one round trip.
+    """
+
+    name = "postgres"
+    # PostgreSQL handles concurrent writers itself
+    single_writer = False
+
+    def __init__(self, dsn=DATABASE_URL, copy_min_rows=PG_COPY_MIN_ROWS, page_size=PG_PAGE_SIZE):
+        if psycopg2 is None:
+            raise RuntimeError("DB_BACKEND=postgres needs psycopg2 (pip install psycopg2-binary)")
+        self.dsn = dsn
+        self.copy_min_rows = copy_min_rows
+        self.page_size = page_size
+        self._translated = {}
+        # NUMERIC columns come back as float like they do from SQLite, so snapshot
+        # comparisons against freshly parsed prices keep working
+        self._numeric = psycopg2.extensions.new_type(
+            psycopg2.extensions.DECIMAL.values, "NUMERIC_AS_FLOAT", _numeric_to_float
+        )
+
+    def connect(self):
+        connection = psycopg2.connect(self.dsn)
+        psycopg2.extensions.register_type(self._numeric, connection)
+        return connection
+
+    def prepare_schema(self, connection):
+        """Create the indexes and bot-owned tables the bots rely on; safe to run on every start
+
+        The stocks table gets its unique symbol constraint from the TypeORM entity, so
+        unlike SQLite there are no legacy duplicates to collapse first.
+        """
+        with connection, connection.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS price_ticks (
+                    series TEXT NOT NULL,
+                    ts BIGINT NOT NULL,
+                    price DOUBLE PRECISION NOT NULL,
+                    PRIMARY KEY (series, ts)
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stock_fund_index (
+                    stock_id TEXT NOT NULL,
+                    fund_id TEXT NOT NULL,
+                    fund_name TEXT NOT NULL,
+                    amc TEXT NOT NULL,
+                    percentage NUMERIC(5, 2) NOT NULL,
+                    PRIMARY KEY (stock_id, fund_id)
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stock_isins (
+                    isin TEXT PRIMARY KEY,
+                    stock_id TEXT NOT NULL
+                )
+            """)
+            _sync_stock_fund_index(cursor)
+
+    def in_transaction(self, connection):
+        return connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def sql(self, query):
+        translated = self._translated.get(query)
+        if translated is None:
+            translated = self._translated[query] = _IS_NOT.sub("IS DISTINCT FROM ", query.replace("?", "%s"))
+        return translated
+
+    def executemany(self, cursor, query, rows):
+        rows = list(rows)
+        plain_insert = _PLAIN_INSERT.match(query)
+        if plain_insert and len(rows) >= self.copy_min_rows:
+            table, columns = plain_insert.groups()
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write("\t".join(_copy_value(value) for value in row))
+                buffer.write("\n")
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({' '.join(columns.split())}) FROM STDIN", buffer)
+        elif _VALUES_GROUP.search(query):
+            psycopg2.extras.execute_values(
+                cursor, self.sql(_VALUES_GROUP.sub("VALUES %s", query)), rows, page_size=self.page_size
+            )
+        else:
+            psycopg2.extras.execute_batch(cursor, self.sql(query), rows, page_size=self.page_size)
+
+
+def backend_from_env():
+    """Build the backend selected by DB_BACKEND"""
+    if DB_BACKEND == "sqlite":
+        return SQLiteBackend()
+    if DB_BACKEND in ("postgres", "postgresql"):
+        return PostgresBackend()
+    raise ValueError(f"Unknown DB_BACKEND {DB_BACKEND!r}; expected 'sqlite' or 'postgres'")
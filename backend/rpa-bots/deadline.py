@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+from log_config import get_logger
+
+logger = get_logger("deadline")
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    """Cooperative time budget for bot work
+
+    Unlike signal.alarm this works on any thread: code checks remaining() or
+    check() between steps, and cancel() lets an orchestrator stop a bot early.
+    A child deadline never outlives its parent.
+    """
+
+    def __init__(self, seconds=None, parent=None):
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self.parent = parent
+        self._cancelled = threading.Event()
+
+    def child(self, seconds=None):
+        return Deadline(seconds, parent=self)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def remaining(self):
+        """Seconds left, or None when there is no limit"""
+        if self.cancelled:
+            return 0.0
+        remaining = None
+        if self.expires_at is not None:
+            remaining = max(0.0, self.expires_at - time.monotonic())
+        if self.parent is not None:
+            parent_remaining = self.parent.remaining()
+            if parent_remaining is not None:
+                remaining = parent_remaining if remaining is None else min(remaining, parent_remaining)
+        return remaining
+
+    @property
+    def expired(self):
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self):
+        if self.expired:
+            raise DeadlineExceeded("Deadline exceeded")
+
+    def budget(self, seconds):
+        """Per-request timeout: the requested seconds capped by what is left"""
+        remaining = self.remaining()
+        return seconds if remaining is None else min(seconds, remaining)
+
+    def sleep(self, seconds):
+        """Sleep that wakes early when the deadline expires or is cancelled"""
+        self._cancelled.wait(self.budget(seconds))
+
+
+def run_until_deadline(executor, fn, items, deadline, poll_interval=0.25):
+    """Run fn over items on executor and collect what finishes before the deadline
+
+    Returns (results, unfinished) where results holds the return values of the
+    calls that succeeded and unfinished counts calls cut off by the deadline.
+    Failed calls are reported and skipped.
+    """
+    futures = {executor.submit(fn, item): item for item in items}
+    pending = set(futures)
+    results = []
+
+    while pending and not deadline.expired:
+        remaining = deadline.remaining()
+        timeout = poll_interval if remaining is None else min(poll_interval, remaining)
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error("Error processing %s: %s", futures[future], e)
+
+    # Calls that never started are dropped; running ones finish in the background
+    for future in pending:
+        future.cancel()
+
+    return results, len(pending)
@@ -0,0 +1,394 @@
+import csv
+import hashlib
+import os
+import re
+import shutil
+import sys
+import time
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+from change_feed import get_change_feed
+from log_config import get_logger
+from records import Fund, Holding, RecordError
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DISCLOSURE_DIR = os.getenv('AMC_DISCLOSURE_DIR', 'disclosures')
+CHUNK_ROWS = int(os.getenv('AMC_CHUNK_ROWS', '5000'))
+HEADER_SCAN_ROWS = 25
+
+logger = get_logger("disclosures")
+
+# Lower-cased header spellings seen across AMC monthly portfolio files
+HEADER_ALIASES = {
+    "fund_name": ("scheme name", "scheme", "fund name", "fund"),
+    "amc": ("amc", "amc name", "fund house"),
+    "category": ("category", "scheme category"),
+    "isin": ("isin", "isin code", "isin no", "isin no."),
+    "symbol": ("symbol", "nse symbol", "ticker"),
+    "company": ("name of the instrument", "name of instrument", "instrument", "company",
+                "company name", "security name", "issuer"),
+    "percentage": ("% to nav", "% of nav", "% to net assets", "percentage", "weight", "% nav"),
+}
+
+ISIN_PATTERN = re.compile(r"^[A-Z]{2}[A-Z0-9]{9}[0-9]$")
+SUMMARY_ROW = re.compile(r"^\s*(sub[\s-]?total|grand total|total|net assets)\b", re.IGNORECASE)
+NAME_NOISE = re.compile(r"\b(ltd|limited|the|co|corp|corporation|inc)\b|[^a-z0-9 ]")
+
+SPREADSHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+RELATIONSHIP_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+
+def _isin_checksum_ok(isin):
+    # ISIN check digit: letters expand to two digits, then Luhn over the digit string
+    digits = "".join(str(int(char, 36)) for char in isin[:-1])
+    total = 0
+    for position, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return (10 - total % 10) % 10 == int(isin[-1])
+
+
+def normalize_isin(value):
+    """Upper-case and strip an ISIN, returning None when it is not a valid one"""
+    isin = re.sub(r"\s+", "", str(value or "")).upper()
+    if ISIN_PATTERN.match(isin) and _isin_checksum_ok(isin):
+        return isin
+    return None
+
+
+def normalize_name(value):
+    return " ".join(NAME_NOISE.sub(" ", str(value or "").lower()).split())
+
+
+def parse_percentage(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "").replace("%", "").replace(",", "").strip()
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def fund_id_for(amc, fund_name):
+    """Stable fund id so re-ingesting a disclosure updates the same fund"""
+    digest = hashlib.sha1(f"{normalize_name(amc)}|{normalize_name(fund_name)}".encode()).hexdigest()
+    return f"mf_{digest[:12]}"
+
+
+def iter_csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as csv_file:
+        yield from csv.reader(csv_file)
+
+
+def _column_index(cell_ref):
+    index = 0
+    for char in cell_ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _iterparse_children(xml_file, parent_tag, child_tag):
+    """Yield each child_tag element of parent_tag as soon as it is parsed, then drop it
+
+    Clearing a yielded element is not enough: the emptied element stays attached
+    to its parent, so the tree still grows with the element count. The parent is
+    cleared instead, detaching every child the caller has finished with.
+    """
+    parent = None
+    for event, element in iterparse(xml_file, events=("start", "end")):
+        if event == "start":
+            if element.tag == parent_tag:
+                parent = element
+        elif element.tag == child_tag:
+            yield element
+            if parent is not None:
+                parent.clear()
+
+
+def iter_xlsx_rows(path):
+    """Stream the first worksheet of an .xlsx file row by row
+
+    The sheet XML is read with iterparse and each row element is dropped once
+    yielded, so the parsed tree stays a row deep however many rows the workbook
+    holds. Only the shared-strings table is kept in memory.
+    """
+    with zipfile.ZipFile(path) as workbook:
+        shared_strings = []
+        if "xl/sharedStrings.xml" in workbook.namelist():
+            with workbook.open("xl/sharedStrings.xml") as strings_file:
+                for element in _iterparse_children(strings_file, f"{SPREADSHEET_NS}sst", f"{SPREADSHEET_NS}si"):
+                    shared_strings.append("".join(text.text or "" for text in element.iter(f"{SPREADSHEET_NS}t")))
+
+        sheet_path = "xl/worksheets/sheet1.xml"
+        with workbook.open("xl/workbook.xml") as workbook_file:
+            first_sheet = next(
+                (element for _, element in iterparse(workbook_file) if element.tag == f"{SPREADSHEET_NS}sheet"),
+                None
+            )
+        if first_sheet is not None and "xl/_rels/workbook.xml.rels" in workbook.namelist():
+            relation_id = first_sheet.get(f"{RELATIONSHIP_NS}id")
+            with workbook.open("xl/_rels/workbook.xml.rels") as rels_file:
+                for _, element in iterparse(rels_file):
+                    if element.get("Id") == relation_id:
+                        target = element.get("Target").lstrip("/")
+                        sheet_path = target if target.startswith("xl/") else f"xl/{target}"
+
+        with workbook.open(sheet_path) as sheet_file:
+            for element in _iterparse_children(sheet_file, f"{SPREADSHEET_NS}sheetData", f"{SPREADSHEET_NS}row"):
+                row = []
+                for cell in element.iter(f"{SPREADSHEET_NS}c"):
+                    column = _column_index(cell.get("r", "")) if cell.get("r") else len(row)
+                    cell_type = cell.get("t")
+                    if cell_type == "inlineStr":
+                        value = "".join(text.text or "" for text in cell.iter(f"{SPREADSHEET_NS}t"))
+                    else:
+                        raw = cell.findtext(f"{SPREADSHEET_NS}v")
+                        if raw is None:
+                            value = ""
+                        elif cell_type == "s":
+                            value = shared_strings[int(raw)]
+                        elif cell_type in ("str", "b", "e"):
+                            value = raw
+                        else:
+                            value = float(raw)
+                    row.extend([""] * (column - len(row)))
+                    row.append(value)
+                yield row
+
+
+def iter_rows(path):
+    if path.lower().endswith(".xlsx"):
+        return iter_xlsx_rows(path)
+    return iter_csv_rows(path)
+
+
+def map_header(row):
+    """Return field -> column index when row looks like a disclosure header, else None"""
+    columns = {}
+    for index, cell in enumerate(row):
+        label = " ".join(str(cell).lower().split())
+        for field, aliases in HEADER_ALIASES.items():
+            if field not in columns and label in aliases:
+                columns[field] = index
+    has_security = any(field in columns for field in ("isin", "symbol", "company"))
+    return columns if has_security and "percentage" in columns else None
+
+
+def _row_reader(row, columns):
+    def cell(field):
+        index = columns.get(field)
+        return row[index] if index is not None and index < len(row) else ""
+    return cell
+
+
+def is_summary_row(row, columns):
+    """True for subtotal and total rows, whichever column carries the label
+
+    The scheme, AMC and category columns are left out: a scheme can be named
+    "Total Market Fund".
+    """
+    fund_columns = {columns[field] for field in ("fund_name", "amc", "category") if field in columns}
+    return any(
+        isinstance(value, str) and SUMMARY_ROW.match(value)
+        for index, value in enumerate(row) if index not in fund_columns
+    )
+
+
+def peak_rss_mb():
+    """High-water mark of the whole process's resident memory so far, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class StockResolver:
+    """Resolve disclosure rows to stock ids by ISIN, then symbol, then company name"""
+
+    def __init__(self, db):
+        self.by_isin = db.get_isin_map()
+        self.by_symbol = {}
+        self.by_name = {}
+        for stock_id, symbol, name, *_ in db.get_stock_rows():
+            self.by_symbol[symbol.upper()] = stock_id
+            self.by_name.setdefault(normalize_name(name), stock_id)
+        self.new_mappings = []
+
+    def resolve(self, isin, symbol, company):
+        if isin and isin in self.by_isin:
+            return self.by_isin[isin]
+        stock_id = self.by_symbol.get(str(symbol or "").strip().upper()) or self.by_name.get(normalize_name(company))
+        if stock_id and isin:
+            # Remember the ISIN so later disclosures resolve without name matching
+            self.by_isin[isin] = stock_id
+            self.new_mappings.append((isin, stock_id))
+        return stock_id
+
+    def drain_mappings(self):
+        mappings, self.new_mappings = self.new_mappings, []
+        return mappings
+
+
+class DisclosureIngestor:
+    """Stream AMC portfolio disclosure files (CSV/XLSX) from a directory into the database
+
+    Rows are read one at a time and flushed in chunks of chunk_rows holdings,
+    one transaction per chunk. The first time a fund appears in a file its
+    previous holdings are replaced, since a monthly disclosure lists the full
+    portfolio. Successfully ingested files move to a processed/ subdirectory.
+    """
+
+    def __init__(self, db, directory=DISCLOSURE_DIR, chunk_rows=CHUNK_ROWS, change_feed=None):
+        self.db = db
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.change_feed = change_feed if change_feed is not None else get_change_feed()
+
+    def pending_files(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.lower().endswith((".csv", ".xlsx"))
+        )
+
+    def ingest_directory(self, deadline=None):
+        reports = []
+        for path in self.pending_files():
+            if deadline is not None:
+                deadline.check()
+            try:
+                report = self.ingest_file(path, deadline)
+            except Exception as e:
+                logger.error("Error ingesting disclosure %s: %s", path, e)
+                reports.append({"file": os.path.basename(path), "error": str(e)})
+                continue
+            processed_dir = os.path.join(self.directory, "processed")
+            os.makedirs(processed_dir, exist_ok=True)
+            shutil.move(path, os.path.join(processed_dir, os.path.basename(path)))
+            reports.append(report)
+        return reports
+
+    def ingest_file(self, path, deadline=None):
+        start_time = time.time()
+        peak_before = peak_rss_mb()
+        self.db.connect()
+        try:
+            resolver = StockResolver(self.db)
+            stats = {"rows": 0, "holdings": 0, "duplicates": 0, "unresolved": 0, "invalid": 0}
+            seen_funds = set()
+            seen_holdings = set()
+            chunk_funds = {}
+            chunk_holdings = []
+            columns = None
+            # Scheme, AMC and category are often merged cells that only fill the first
+            # row of a block, so blanks inherit the value from the row above
+            fund_name = os.path.splitext(os.path.basename(path))[0]
+            amc = "Unknown AMC"
+            category = "Unknown"
+
+            for row in iter_rows(path):
+                if columns is None:
+                    # Skip title rows until the header appears
+                    stats["rows"] += 1
+                    if stats["rows"] > HEADER_SCAN_ROWS:
+                        raise ValueError("No disclosure header found")
+                    columns = map_header(row)
+                    continue
+
+                stats["rows"] += 1
+                cell = _row_reader(row, columns)
+                percentage = parse_percentage(cell("percentage"))
+                fund_name = str(cell("fund_name") or fund_name).strip()
+                amc = str(cell("amc") or amc).strip()
+                category = str(cell("category") or category).strip()
+                if percentage is None or is_summary_row(row, columns):
+                    continue  # Blank, section and total rows
+
+                fund_id = fund_id_for(amc, fund_name)
+                if fund_id not in seen_funds:
+                    try:
+                        chunk_funds[fund_id] = Fund.create(fund_id, fund_name, amc, category)
+                    except RecordError as e:
+                        stats["invalid"] += 1
+                        logger.debug("Skipping row %d of %s: %s", stats["rows"], path, e)
+                        continue
+                    seen_funds.add(fund_id)
+
+                stock_id = resolver.resolve(normalize_isin(cell("isin")), cell("symbol"), cell("company"))
+                if stock_id is None:
+                    stats["unresolved"] += 1
+                    continue
+                if (fund_id, stock_id) in seen_holdings:
+                    stats["duplicates"] += 1
+                    continue
+                try:
+                    holding = Holding.create(fund_id, stock_id, percentage)
+                except RecordError as e:
+                    stats["invalid"] += 1
+                    logger.debug("Skipping row %d of %s: %s", stats["rows"], path, e)
+                    continue
+                seen_holdings.add((fund_id, stock_id))
+                chunk_holdings.append(holding)
+
+                if len(chunk_holdings) >= self.chunk_rows:
+                    self._flush(chunk_funds, chunk_holdings, resolver)
+                    stats["holdings"] += len(chunk_holdings)
+                    chunk_funds, chunk_holdings = {}, []
+                    if deadline is not None:
+                        deadline.check()
+
+            self._flush(chunk_funds, chunk_holdings, resolver)
+            stats["holdings"] += len(chunk_holdings)
+        finally:
+            self.db.disconnect()
+
+        seconds = round(time.time() - start_time, 2)
+        process_peak = peak_rss_mb()
+        report = {
+            "file": os.path.basename(path),
+            "funds": len(seen_funds),
+            **stats,
+            "seconds": seconds,
+            "rows_per_second": round(stats["rows"] / seconds) if seconds else stats["rows"],
+            # The OS only tracks the process's peak; this file's share is how far it raised it
+            "process_peak_rss_mb": process_peak,
+            "peak_rss_growth_mb": None if process_peak is None else round(process_peak - peak_before, 1)
+        }
+        logger.info(
+            "Ingested %s: %d rows, %d funds, %d holdings (%d unresolved, %d duplicates, %d invalid) "
+            "in %s seconds, %s rows/s, process peak RSS %s MB (+%s MB)",
+            report["file"], report["rows"], report["funds"], report["holdings"], report["unresolved"],
+            report["duplicates"], report["invalid"], seconds, report["rows_per_second"],
+            report["process_peak_rss_mb"], report["peak_rss_growth_mb"]
+        )
+        return report
+
+    def _flush(self, funds, holdings, resolver):
+        """Write one chunk in a single transaction"""
+        if not funds and not holdings:
+            return
+        touched_funds = {holding.fund_id for holding in holdings} | set(funds)
+        with self.db.transaction():
+            self.db.upsert_funds(funds.values())
+            # First sighting of a fund in this file replaces its previous portfolio
+            self.db.delete_fund_holdings(funds.keys())
+            self.db.upsert_fund_holdings(holdings)
+            self.db.add_isin_mappings(resolver.drain_mappings())
+            self.db.refresh_stock_fund_index(touched_funds)
+        self.change_feed.publish("fund", funds.values())
+        self.change_feed.publish("holding", holdings)
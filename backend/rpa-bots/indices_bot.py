@@ -1,43 +1,68 @@
 from base_bot import BaseBot
-import time
-import random
+from nse_client import NSEClient
+from nse_parser import parse_all_indices_payload
+from snapshot import SnapshotCache
+from price_history import PriceHistory
+import os
+
+# Index names to track, as NSE spells them (e.g. "NIFTY 50,NIFTY BANK,NIFTY PHARMA"),
+# or * for every index in the allIndices response. BSE indices such as SENSEX are not
+# in it, so their stored rows are left as they are.
+INDEX_NAMES = os.getenv('NSE_INDICES', 'NIFTY 50,NIFTY BANK,NIFTY IT')
+
 
 class IndicesBot(BaseBot):
-    def __init__(self):
+    def __init__(self, index_names=INDEX_NAMES):
         super().__init__("Indices Data Bot")
+        names = [name.strip() for name in index_names.split(',') if name.strip()]
+        self.index_names = None if names == ["*"] else names
+        self.nse_client = NSEClient()
+        # Last written IndexQuote per index
+        self.index_snapshot = SnapshotCache(key_index=0, compare_indexes=(2, 3, 4))
+        self.price_history = PriceHistory(self.db)
 
     def execute(self):
-        """Simulate scraping index information"""
-        print(f"{self.bot_name}: Simulating index information update")
-        
-        # Simulate processing time
-        time.sleep(random.uniform(1, 2))
-        
-        # For demonstration, we'll simulate updating indices
-        self.db.connect()
-        
-        # Update all indices with random changes
-        indices = [
-            ("idx1", "NIFTY 50"),
-            ("idx2", "SENSEX"),
-            ("idx3", "NIFTY BANK"),
-            ("idx4", "NIFTY IT")
-        ]
-        
-        for index_id, index_name in indices:
-            # Generate random changes
-            change = round(random.uniform(-100, 100), 2)
-            percent_change = round(random.uniform(-2, 2), 2)
-            # Get current value from a simulated source
-            current_value = round(random.uniform(10000, 80000), 2)
-            new_value = round(current_value + change, 2)
-            
-            self.db.update_index(index_id, new_value, change, percent_change)
-        
-        self.db.disconnect()
-        
-        print(f"{self.bot_name}: Index information updated successfully")
+        """Fetch every tracked index in one allIndices request and write the ones that moved"""
+        self.logger.info("Fetching index quotes from NSE")
+
+        # One request covers every index, however many are configured
+        with self.phase("fetch"):
+            payload = self.nse_client.get_json("/api/allIndices", deadline=self.deadline)
+
+        with self.phase("parse"):
+            quotes = parse_all_indices_payload(payload, self.index_names)
+        if not quotes:
+            raise RuntimeError("No index quotes in the allIndices response")
+
+        if self.index_names is not None and len(quotes) < len(self.index_names):
+            found = {quote.name.upper() for quote in quotes}
+            missing = [name for name in self.index_names if name.upper() not in found]
+            self.logger.warning("Indices not in the NSE response: %s", ", ".join(missing))
+
+        if not self.index_snapshot.loaded:
+            self.db.connect()
+            self.index_snapshot.load(self.db.get_index_rows())
+            self.db.disconnect()
+            # e.g. SENSEX (idx2): a BSE index, so never in NSE's allIndices response
+            fetched = {quote.id for quote in quotes}
+            untracked = [f"{row[1]} ({row[0]})" for row in self.index_snapshot.rows.values() if row[0] not in fetched]
+            if untracked:
+                self.logger.warning("Stored indices this bot does not update: %s", ", ".join(sorted(untracked)))
+
+        # Skip indices that have not moved since the last committed run
+        changed_indices = self.index_snapshot.changed(quotes)
+
+        # Don't start writing once the run has been cancelled or overrun its budget
+        self.deadline.check()
+        with self.phase("db_write"), self.db.transaction():
+            self.db.upsert_indices(changed_indices)
+            self.price_history.append((quote.id, quote.value) for quote in changed_indices)
+
+        self.index_snapshot.update(changed_indices)
+        self.change_feed.publish("index", changed_indices)
+
+        self.logger.info("%d of %d indices updated", len(changed_indices), len(quotes))
 
 if __name__ == "__main__":
     bot = IndicesBot()
-    bot.run()
\ No newline at end of file
+    bot.run()
@@ -0,0 +1,113 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# 'json' for one object per line, 'text' for a human readable line
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s%(context)s: %(message)s"
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as one JSON object, carrying `extra` fields through as keys"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """TEXT_FORMAT, with any `extra` fields (such as the bot name) shown as [key=value]"""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record):
+        record = copy.copy(record)
+        context = " ".join(f"{key}={value}" for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        record.context = f" [{context}]" if context else ""
+        return super().format(record)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The stock QueueHandler bakes the traceback into msg; keep it in exc_text
+        # instead so the JSON formatter can emit it as its own field.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: "logging.handlers.QueueListener | None" = None
+_lock = threading.Lock()
+
+
+def configure(level=LOG_LEVEL, log_format=LOG_FORMAT, stream=None):
+    """Route the 'rpa' logger tree through a queue drained by one background writer
+
+    Callers only pay for putting the record on the queue; formatting and the
+    blocking stdout write happen on the listener thread.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+        handler = logging.StreamHandler(stream or sys.stdout)
+        handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+        log_queue = queue.SimpleQueue()
+        logger = logging.getLogger("rpa")
+        logger.handlers = [_QueueHandler(log_queue)]
+        logger.setLevel(level)
+        logger.propagate = False
+        _listener = logging.handlers.QueueListener(log_queue, handler)
+        _listener.start()
+
+
+def shutdown():
+    """Stop the listener after it has written every queued record"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(name, **context):
+    """Return the 'rpa.<name>' logger, with context fields added to every record when given"""
+    if _listener is None:
+        configure()
+    logger = logging.getLogger(f"rpa.{name}")
+    if context:
+        return logging.LoggerAdapter(logger, context)
+    return logger
+
+
+atexit.register(shutdown)
@@ -0,0 +1,157 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from log_config import get_logger
+
+METRICS_FILE = os.getenv('METRICS_FILE')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+logger = get_logger("metrics")
+
+# Seconds; spans sub-millisecond SQLite commits up to multi-minute scrapes
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+HELP = {
+    "rpa_bot_run_seconds": "Wall-clock duration of a whole bot run",
+    "rpa_bot_phase_seconds": "Duration of one phase (fetch, parse, db_write) of a bot run",
+    "rpa_db_commit_seconds": "Time spent committing database transactions",
+    "rpa_db_lock_wait_seconds": "Time spent waiting for the in-process database write lock",
+    "rpa_db_rows_written_total": "Rows sent to the database by bulk writes",
+    "rpa_http_retries_total": "HTTP requests retried after a rate limit, server error or dropped connection",
+    "rpa_circuit_opened_total": "Times a source's circuit breaker opened",
+    "rpa_circuit_rejected_total": "Calls rejected without a request because the source's circuit was open",
+    "rpa_response_cache_total": "Source lookups by cache result (fresh, revalidated, stale, miss)",
+    "rpa_change_feed_events_total": "Committed changes appended to the change feed, by event type",
+}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Thread-safe in-process store of counters and histograms keyed by name and labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self.counters), ("histogram", self.histograms)):
+                for name in sorted({key[0] for key in store}):
+                    lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (metric_name, labels), value in sorted(store.items()):
+                        if metric_name != name:
+                            continue
+                        if kind == "counter":
+                            lines.append(f"{name}{label_text(labels)} {value}")
+                            continue
+                        cumulative = 0
+                        for bound, count in zip(value.buckets, value.counts):
+                            cumulative += count
+                            lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                        lines.append(f"{name}_bucket{label_text(labels, [('le', '+Inf')])} {value.count}")
+                        lines.append(f"{name}_sum{label_text(labels)} {value.sum:.6f}")
+                        lines.append(f"{name}_count{label_text(labels)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Atomically replace path with the current metrics, for node_exporter's textfile collector"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as metrics_file:
+            metrics_file.write(self.render())
+        os.replace(temp_path, path)
+
+
+REGISTRY = Registry()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+
+
+def export():
+    """Write the metrics file when METRICS_FILE is configured"""
+    if METRICS_FILE:
+        try:
+            REGISTRY.write_file(METRICS_FILE)
+        except OSError as e:
+            logger.error("Error writing metrics file: %s", e)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(port=METRICS_PORT, host="127.0.0.1"):
+    """Serve /metrics on a background thread; returns the server, or None when disabled"""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Metrics available at http://%s:%d/metrics", host, port)
+    return server
@@ -1,79 +1,128 @@
 from base_bot import BaseBot
 from firecrawl import FirecrawlApp
+from nse_client import NSEClient
+from circuit_breaker import get_breaker
+from response_cache import get_response_cache
+from deadline import run_until_deadline
+from snapshot import SnapshotCache
+from nse_parser import StockColumns, parse_preopen_payload
+from price_history import PriceHistory
+from parse_pool import ParsePool
+from concurrent.futures import ThreadPoolExecutor
 import os
 import time
 import random
 
+# market-data-pre-open keys to pull on each run, e.g. NIFTY,BANKNIFTY,FO,SME,OTHERS
+PREOPEN_KEYS = [key.strip() for key in os.getenv('NSE_PREOPEN_KEYS', 'NIFTY,BANKNIFTY').split(',') if key.strip()]
+
+# URLs for NSE market data, scraped with FireCrawl when the JSON API fails
+NSE_URLS = [
+    "https://www.nseindia.com/",
+    "https://www.nseindia.com/market-data/live-equity-market"
+]
+
+# Overall budget for the FireCrawl fallback and the cap on any single scrape
+SCRAPE_BUDGET_SECONDS = 60
+SCRAPE_REQUEST_TIMEOUT = 30
+
 class NSEBot(BaseBot):
     def __init__(self):
         super().__init__("NSE Stock Information Bot")
         api_key = os.getenv('FIRECRAWL_API_KEY', 'your_firecrawl_api_key_here')
         self.firecrawl = FirecrawlApp(api_key=api_key)
+        self.nse_client = NSEClient()
+        self.firecrawl_breaker = get_breaker("firecrawl")
+        self.response_cache = get_response_cache()
+        # Most recent real scrape, served when every source is down
+        self.last_good = None
+        self.scrape_executor = ThreadPoolExecutor(max_workers=len(NSE_URLS), thread_name_prefix="nse-scrape")
+        # Last written row per symbol, warmed from the database on first run; stock ids
+        # come from here and unchanged quotes are never re-sent. market_cap is still a
+        # placeholder from the scrapers, so it is not part of the comparison.
+        self.stock_snapshot = SnapshotCache(key_index=1, compare_indexes=(2, 3, 5))
+        self.price_history = PriceHistory(self.db)
+        self.parse_pool = ParsePool()
 
     def scrape_nse_data(self):
-        """Scrape stock information from NSE using FireCrawl"""
+        """Scrape stock information from NSE as StockColumns, falling back to FireCrawl
+
+        Both sources serve their last good response from the response cache while
+        they are failing or their circuit is open. When neither has anything, the
+        bot's last real scrape is reused before resorting to sample data.
+        """
         try:
-            # URLs for NSE market data
-            urls = [
-                "https://www.nseindia.com/",
-                "https://www.nseindia.com/market-data/live-equity-market"
-            ]
-            
             # Try to get CSV data first
             csv_data = self.get_nse_csv_data()
-            if csv_data and len(csv_data) > 0:
-                return {"stocks": csv_data}
-            
-            # If CSV fails, fall back to FireCrawl scraping
-            all_stocks = []
-            
-            # Import signal for timeout handling
-            import signal
+            if len(csv_data) > 0:
+                self.last_good = csv_data
+                return csv_data
             
-            def timeout_handler(signum, frame):
-                raise TimeoutError("Scraping process timed out")
-            
-            # Set timeout to 60 seconds for the entire process
-            signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(60)
-            
-            try:
-                for url in urls:
-                    try:
-                        # Scrape the page using FireCrawl with timeout
-                        scrape_result = self.firecrawl.scrape(url, formats=['markdown', 'html'], timeout=30)
-                        
-                        # Parse the scraped data to extract stock information
-                        stocks = self.parse_nse_data(scrape_result)
-                        all_stocks.extend(stocks)
-                        
-                        # Add a small delay between requests
-                        time.sleep(1)
-                    except Exception as url_error:
-                        print(f"{self.bot_name}: Error scraping {url}: {url_error}")
-                        continue
-                
-                # Cancel the timeout
-                signal.alarm(0)
-                
-                # If we couldn't scrape real data, fall back to sample data
-                if not all_stocks:
-                    print(f"{self.bot_name}: Could not scrape real data, using sample data")
-                    sample_data = self.generate_sample_stock_data()
-                    return sample_data
-                
-                return {"stocks": all_stocks}
-            except TimeoutError:
-                # Cancel the timeout
-                signal.alarm(0)
-                print(f"{self.bot_name}: Scraping process timed out, using sample data")
-                sample_data = self.generate_sample_stock_data()
-                return sample_data
+            # If CSV fails, fall back to scraping every FireCrawl URL in parallel
+            scraped = self.scrape_with_firecrawl()
+            if len(scraped) > 0:
+                self.last_good = scraped
+                return scraped
             
         except Exception as e:
-            print(f"{self.bot_name}: Error scraping NSE data: {e}")
-            # Return sample data in case of error
-            return self.generate_sample_stock_data()
+            self.logger.error("Error scraping NSE data: %s", e)
+        
+        return self.fallback_stock_data()
+
+    def scrape_page(self, url, scrape_deadline):
+        """Scrape one page into a {'html', 'markdown'} dict, through the breaker and the response cache"""
+        cached = self.response_cache.get(url)
+        if self.response_cache.is_fresh(cached):
+            return cached.data
+        try:
+            result = self.firecrawl_breaker.call(
+                self.firecrawl.scrape,
+                url,
+                formats=['markdown', 'html'],
+                timeout=scrape_deadline.budget(SCRAPE_REQUEST_TIMEOUT)
+            )
+        except Exception:
+            if cached is None:
+                raise
+            return cached.data
+        # FireCrawl returns a dict or a document object depending on the client version
+        if isinstance(result, dict):
+            page = {'html': result.get('html'), 'markdown': result.get('markdown')}
+        else:
+            page = {'html': getattr(result, 'html', None), 'markdown': getattr(result, 'markdown', None)}
+        if page['html'] or page['markdown']:
+            self.response_cache.put(url, page)
+        return page
+
+    def scrape_with_firecrawl(self):
+        """Scrape every NSE_URLS page with FireCrawl within the scrape budget"""
+        scrape_deadline = self.deadline.child(SCRAPE_BUDGET_SECONDS)
+        
+        with self.phase("fetch"):
+            results, unfinished = run_until_deadline(
+                self.scrape_executor,
+                lambda url: self.scrape_page(url, scrape_deadline),
+                NSE_URLS,
+                scrape_deadline
+            )
+        
+        # Parse the scraped pages in worker processes to extract stock information
+        with self.phase("parse"):
+            all_stocks = self.parse_nse_data(results)
+        
+        if unfinished:
+            self.logger.warning("Scraping deadline hit with %d URL(s) outstanding", unfinished)
+        
+        return StockColumns.from_tuples(all_stocks)
+
+    def fallback_stock_data(self):
+        """Last good scrape of this bot, or sample data when there has been none"""
+        if self.last_good is not None:
+            self.logger.warning("No source available, reusing the last good scrape")
+            return self.last_good
+        # If we couldn't scrape real data, fall back to sample data
+        self.logger.warning("Could not scrape real data, using sample data")
+        return StockColumns.from_records(self.generate_sample_stock_data()["stocks"])
 
     def generate_sample_stock_data(self):
         """Generate sample stock data for demonstration"""
@@ -112,126 +161,83 @@ class NSEBot(BaseBot):
         }
 
     def get_nse_csv_data(self):
-        """Download and parse CSV data from NSE"""
+        """Download and parse pre-open market data for every configured NSE key"""
         try:
-            import requests
-            import csv
-            from io import StringIO
-            
-            # NSE CSV endpoint for equity market data
-            csv_url = "https://www.nseindia.com/api/market-data-pre-open?key=NIFTY"
-            
-            # Set headers to mimic a browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-            }
-            
-            # Make request with timeout
-            response = requests.get(csv_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            # Parse JSON response (NSE actually returns JSON, not CSV)
-            import json
-            data = response.json()
+            # NSE actually returns JSON, not CSV; fetch all keys concurrently over warm sessions
+            with self.phase("fetch"):
+                payloads = self.nse_client.get_many([
+                    ("/api/market-data-pre-open", {"key": key}) for key in PREOPEN_KEYS
+                ], self.deadline)
             
-            # Extract stock data
-            stocks = []
-            if 'data' in data:
-                for item in data['data'][:10]:  # Limit to first 10 stocks
-                    # Check if 'metadata' exists instead of 'meta'
-                    if 'metadata' in item:
-                        metadata = item['metadata']
-                        stock = {
-                            "symbol": metadata.get('symbol', 'UNKNOWN'),
-                            "name": metadata.get('companyName', 'Unknown Company'),
-                            "price": metadata.get('lastPrice', 0),
-                            "market_cap": random.randint(100000, 2000000),  # Placeholder
-                            "sector": metadata.get('industry', 'Unknown')
-                        }
-                        stocks.append(stock)
-            
-            return stocks
+            # Merge the keys column-wise, keeping the first quote seen for a symbol
+            with self.phase("parse"):
+                return StockColumns.concat([parse_preopen_payload(data) for data in payloads]).unique_symbols()
             
         except Exception as e:
-            print(f"{self.bot_name}: Error downloading/parsing NSE CSV data: {e}")
-            return []
+            self.logger.error("Error downloading/parsing NSE CSV data: %s", e)
+            return StockColumns.empty()
     
-    def parse_nse_data(self, scrape_result):
-        """Parse scraped NSE data to extract stock information"""
-        stocks = []
-        
-        # In a real implementation, you would parse the actual scraped content
-        # This is a simplified example of how you might extract stock data
-        
-        # For demonstration, we'll create some realistic stock data
-        # In practice, you would extract this from the scrape_result
-        sample_stocks = [
-            {
-                "symbol": "RELIANCE",
-                "name": "Reliance Industries Ltd",
-                "price": round(random.uniform(2000, 3000), 2),
-                "market_cap": random.randint(1000000, 2000000),
-                "sector": "Energy"
-            },
-            {
-                "symbol": "TCS",
-                "name": "Tata Consultancy Services Ltd",
-                "price": round(random.uniform(3000, 4000), 2),
-                "market_cap": random.randint(1000000, 1500000),
-                "sector": "Technology"
-            }
-        ]
+    def parse_nse_data(self, scrape_results):
+        """Parse scraped NSE pages into (symbol, name, sector, price, change) tuples"""
+        documents = []
+        for scrape_result in scrape_results:
+            # FireCrawl returns a dict or a document object depending on the client version
+            if isinstance(scrape_result, dict):
+                document = scrape_result.get('html') or scrape_result.get('markdown')
+            else:
+                document = getattr(scrape_result, 'html', None) or getattr(scrape_result, 'markdown', None)
+            if document:
+                documents.append(document)
         
-        stocks.extend(sample_stocks)
+        stocks = []
+        for rows in self.parse_pool.parse(documents):
+            stocks.extend(rows)
         return stocks
     
     def execute(self):
         """Scrape stock information from NSE using FireCrawl"""
-        print(f"{self.bot_name}: Scraping stock information from NSE using FireCrawl")
+        self.logger.info("Scraping stock information from NSE using FireCrawl")
         
         # Scrape data from NSE
-        scraped_data = self.scrape_nse_data()
-        
-        # Process the scraped data
-        self.db.connect()
+        columns = self.scrape_nse_data().unique_symbols()
         
-        # Track which stocks we've added to avoid duplicates
-        added_symbols = set()
+        if not self.stock_snapshot.loaded:
+            self.db.connect()
+            self.stock_snapshot.load(self.db.get_stock_rows())
+            self.db.disconnect()
         
-        # Add new stocks from scraped data
-        for stock in scraped_data["stocks"]:
-            # Avoid adding duplicate stocks
-            if stock["symbol"] in added_symbols:
-                continue
-                
-            stock_data = (
-                f"s{int(time.time() * 1000000)}",  # Unique ID
-                stock["symbol"],
-                stock["name"],
-                stock["price"],
-                stock["market_cap"],
-                stock["sector"]
-            )
-            
-            self.db.add_stock(stock_data)
-            added_symbols.add(stock["symbol"])
+        # Known stocks keep their id; new symbols get a fresh one
+        id_prefix = f"s{time.time_ns() // 1000}"
+        stock_ids = []
+        for position, symbol in enumerate(columns.symbol.tolist()):
+            known = self.stock_snapshot.get(symbol)
+            stock_ids.append(known[0] if known else f"{id_prefix}_{position}")
+        stock_rows = list(columns.rows(stock_ids))
         
-        # Update multiple existing stock prices for more realistic simulation
-        existing_stocks = ["s1", "s2", "s3", "s4", "s5"]
-        num_updates = min(3, len(existing_stocks))  # Update up to 3 stocks
-        stocks_to_update = random.sample(existing_stocks, num_updates)
+        # Only quotes that moved since the last committed run reach the database
+        changed_stocks = self.stock_snapshot.changed(stock_rows)
+        self.logger.info("%d of %d stocks changed", len(changed_stocks), len(stock_rows))
         
-        for stock_id in stocks_to_update:
-            new_price = round(random.uniform(100, 2000), 2)
-            self.db.update_stock_price(stock_id, new_price)
+        # Write everything in one transaction so the run costs a single commit,
+        # unless the run has been cancelled or overrun its budget meanwhile
+        self.deadline.check()
+        with self.phase("db_write"), self.db.transaction():
+            self.db.upsert_stocks(changed_stocks)
+            # A symbol the snapshot did not know may have been added since it was loaded
+            # (e.g. through the API); the upsert keeps that row's id, so read it back
+            new_symbols = [stock.symbol for stock in changed_stocks if self.stock_snapshot.get(stock.symbol) is None]
+            if new_symbols:
+                stored_ids = self.db.get_stock_ids(new_symbols)
+                changed_stocks = [
+                    stock._replace(id=stored_ids[stock.symbol]) if stock.symbol in stored_ids else stock
+                    for stock in changed_stocks
+                ]
+            self.price_history.append((stock.symbol, stock.price) for stock in changed_stocks)
         
-        self.db.disconnect()
+        self.stock_snapshot.update(changed_stocks)
+        self.change_feed.publish("stock", changed_stocks)
         
-        print(f"{self.bot_name}: Stock information updated successfully")
+        self.logger.info("Stock information updated successfully")
 
 if __name__ == "__main__":
     bot = NSEBot()
@@ -0,0 +1,188 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from circuit_breaker import CircuitOpen, get_breaker
+from response_cache import get_response_cache
+from log_config import get_logger
+
+NSE_BASE_URL = os.getenv('NSE_BASE_URL', 'https://www.nseindia.com')
+NSE_MAX_WORKERS = int(os.getenv('NSE_MAX_WORKERS', '4'))
+NSE_REQUEST_TIMEOUT = float(os.getenv('NSE_REQUEST_TIMEOUT', '15'))
+NSE_MIN_INTERVAL = float(os.getenv('NSE_MIN_INTERVAL', '0.2'))
+
+logger = get_logger("nse_client")
+
+# Headers to mimic a browser request; NSE rejects obvious scripts
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json,text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class NSEClient:
+    """Keep-alive HTTP client for NSE JSON endpoints with rate limiting and retries
+
+    Each worker thread gets its own requests.Session (Session objects are not
+    thread-safe), primed once with the cookies NSE hands out on its home page and
+    reused for every later call. Calls go through the shared "nse" circuit breaker,
+    so once NSE is blocking us they fail immediately instead of waiting out timeouts.
+    """
+
+    def __init__(self, base_url=NSE_BASE_URL, max_workers=NSE_MAX_WORKERS,
+                 timeout=NSE_REQUEST_TIMEOUT, min_interval=NSE_MIN_INTERVAL,
+                 max_retries=3, backoff=0.5, cache=None):
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._next_request_at = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nse-fetch")
+        self.breaker = get_breaker("nse")
+        self.cache = cache if cache is not None else get_response_cache()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(BROWSER_HEADERS)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            try:
+                session.get(self.base_url, timeout=self.timeout)
+            except requests.RequestException:
+                pass  # Cookie priming is best effort; the API call reports real failures
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _throttle(self):
+        """Space request starts at least min_interval apart across all threads"""
+        with self._lock:
+            now = time.monotonic()
+            wait_for = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.min_interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+    def _retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+
+    def _wait_to_retry(self, attempt, deadline, response=None):
+        """Sleep before the next attempt; False when the deadline would expire first"""
+        delay = self._retry_delay(attempt, response)
+        if deadline is None:
+            time.sleep(delay)
+            return True
+        remaining = deadline.remaining()
+        if remaining is not None and delay >= remaining:
+            return False
+        deadline.sleep(delay)
+        return True
+
+    def get_json(self, path, params=None, deadline=None):
+        """GET a JSON endpoint, retrying rate limits, server errors and dropped connections
+
+        Responses younger than the cache TTL are served without a request and older
+        ones are revalidated with ETag / Last-Modified. When NSE fails, or its circuit
+        is open, the last good response is served instead; CircuitOpen is only raised
+        when there is none. With a deadline, a retry whose back-off would outlast it
+        is given up and the last failure handled as if retries had run out.
+        """
+        key = self.cache.key(f"{self.base_url}{path}", params)
+        cached = self.cache.get(key)
+        if self.cache.is_fresh(cached):
+            metrics.inc("rpa_response_cache_total", source="nse", result="fresh")
+            return cached.data
+        if not self.breaker.allow():
+            if cached is not None:
+                metrics.inc("rpa_response_cache_total", source="nse", result="stale")
+                return cached.data
+            raise CircuitOpen("nse circuit is open")
+        try:
+            data = self._get_json(path, params, key, cached, deadline)
+        except Exception as e:
+            self.breaker.record_failure()
+            if cached is None:
+                raise
+            logger.warning(
+                "NSE fetch of %s %s failed, serving a %d second old response: %s", path, params or '', cached.age(), e
+            )
+            metrics.inc("rpa_response_cache_total", source="nse", result="stale")
+            return cached.data
+        self.breaker.record_success()
+        return data
+
+    def _get_json(self, path, params, key, cached, deadline):
+        url = f"{self.base_url}{path}"
+        session = self._session()
+        headers = {}
+        if cached is not None and cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+        for attempt in range(self.max_retries + 1):
+            self._throttle()
+            try:
+                response = session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                # Stop retrying once other calls have tripped the breaker
+                if attempt == self.max_retries or not self.breaker.available():
+                    raise
+                if not self._wait_to_retry(attempt, deadline):
+                    raise
+                metrics.inc("rpa_http_retries_total", source="nse")
+                continue
+            if (response.status_code in RETRY_STATUSES and attempt < self.max_retries and self.breaker.available()
+                    and self._wait_to_retry(attempt, deadline, response)):
+                metrics.inc("rpa_http_retries_total", source="nse")
+                continue
+            if response.status_code == 304 and cached is not None:
+                self.cache.touch(key)
+                metrics.inc("rpa_response_cache_total", source="nse", result="revalidated")
+                return cached.data
+            response.raise_for_status()
+            data = response.json()
+            self.cache.put(key, data, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            metrics.inc("rpa_response_cache_total", source="nse", result="miss")
+            return data
+
+    def get_many(self, calls, deadline=None):
+        """Fetch several (path, params) calls concurrently; failed calls come back as None"""
+        def fetch(call):
+            path, params = call
+            try:
+                return self.get_json(path, params, deadline)
+            except Exception as e:
+                logger.warning("NSE fetch of %s %s failed: %s", path, params or '', e)
+                return None
+
+        return list(self._executor.map(fetch, calls))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions = []
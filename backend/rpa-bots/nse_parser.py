@@ -0,0 +1,210 @@
+import re
+
+import numpy as np
+
+from records import IndexQuote, RecordError, Stock
+
+# Scrapers do not provide market capitalisation yet, so new rows get a placeholder
+PLACEHOLDER_MARKET_CAP = (100000, 2000000)
+DEFAULT_NAME = "Unknown Company"
+DEFAULT_SECTOR = "Unknown"
+
+# Ids the frontend has always used for these indices; other indices get an id from their name
+KNOWN_INDEX_IDS = {
+    "NIFTY 50": "idx1",
+    "SENSEX": "idx2",
+    "NIFTY BANK": "idx3",
+    "NIFTY IT": "idx4"
+}
+
+
+def index_id_for(name):
+    known = KNOWN_INDEX_IDS.get(name.upper())
+    if known:
+        return known
+    return "idx_" + re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _text_values(values, default=""):
+    """Strip an object column, replacing None and blank entries with default"""
+    return np.array(
+        [(str(value).strip() if value is not None else "") or default for value in values.tolist()],
+        dtype=object
+    )
+
+
+def _to_float(value):
+    """Float for a JSON number or a numeric string such as "1,234.50"; NaN when missing or not a number"""
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        value = value.replace(",", "").strip()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class StockColumns:
+    """Struct-of-arrays batch of scraped stock quotes
+
+    Text fields are object arrays and numeric fields float64/int64 arrays, so derived
+    values are computed with NumPy over the whole batch instead of per row.
+    """
+
+    def __init__(self, symbol, name, sector, price, change, market_cap):
+        self.symbol = symbol
+        self.name = name
+        self.sector = sector
+        self.price = price
+        self.change = change
+        self.market_cap = market_cap
+
+    def __len__(self):
+        return len(self.symbol)
+
+    def validated(self):
+        """Normalise the text columns and drop rows that cannot be written
+
+        Symbols are stripped and upper-cased, missing names and sectors get their
+        defaults, and rows without a symbol or without a positive, finite price are
+        dropped. Parsers call this once, so every Stock later built by rows() is valid.
+        """
+        symbol = np.array([value.upper() for value in _text_values(self.symbol).tolist()], dtype=object)
+        columns = StockColumns(
+            symbol, _text_values(self.name, DEFAULT_NAME), _text_values(self.sector, DEFAULT_SECTOR),
+            self.price, self.change, self.market_cap
+        )
+        keep = np.isfinite(self.price) & (self.price > 0) & (symbol != "")
+        return columns if keep.all() else columns.take(np.flatnonzero(keep))
+
+    @classmethod
+    def empty(cls):
+        return cls.from_records([])
+
+    @classmethod
+    def from_records(cls, records):
+        """Build columns from the dict rows produced by the sample data path"""
+        records = list(records)
+        count = len(records)
+        return cls(
+            symbol=np.array([record["symbol"] for record in records], dtype=object),
+            name=np.array([record["name"] for record in records], dtype=object),
+            sector=np.array([record["sector"] for record in records], dtype=object),
+            price=np.fromiter((record["price"] for record in records), dtype=np.float64, count=count),
+            change=np.full(count, np.nan),
+            market_cap=np.fromiter((record["market_cap"] for record in records), dtype=np.int64, count=count)
+        ).validated()
+
+    @classmethod
+    def from_tuples(cls, rows, rng=None):
+        """Build columns from (symbol, name, sector, price, change) tuples produced by parse_pool"""
+        rows = list(rows)
+        count = len(rows)
+        rng = rng or np.random.default_rng()
+        return cls(
+            symbol=np.array([row[0] for row in rows], dtype=object),
+            name=np.array([row[1] for row in rows], dtype=object),
+            sector=np.array([row[2] for row in rows], dtype=object),
+            price=np.fromiter((row[3] for row in rows), dtype=np.float64, count=count),
+            change=np.fromiter((np.nan if row[4] is None else row[4] for row in rows), dtype=np.float64, count=count),
+            market_cap=rng.integers(*PLACEHOLDER_MARKET_CAP, size=count, dtype=np.int64)
+        ).validated()
+
+    @classmethod
+    def concat(cls, batches):
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        return cls(*(
+            np.concatenate([getattr(batch, field) for batch in batches])
+            for field in ("symbol", "name", "sector", "price", "change", "market_cap")
+        ))
+
+    def take(self, indexes):
+        return StockColumns(
+            self.symbol[indexes], self.name[indexes], self.sector[indexes],
+            self.price[indexes], self.change[indexes], self.market_cap[indexes]
+        )
+
+    def unique_symbols(self):
+        """Drop repeated symbols, keeping the first occurrence in scrape order"""
+        if not len(self):
+            return self
+        _, first_indexes = np.unique(self.symbol.astype(str), return_index=True)
+        first_indexes.sort()
+        return self.take(first_indexes)
+
+    def direction(self):
+        """price_change_direction per row: 'up', 'down', 'none', or None when change is unknown"""
+        direction = np.where(self.change > 0, "up", np.where(self.change < 0, "down", "none")).astype(object)
+        direction[np.isnan(self.change)] = None
+        return direction
+
+    def rows(self, stock_ids):
+        """Yield a Stock record per row, ready for Database.upsert_stocks"""
+        return map(Stock._make, zip(
+            stock_ids,
+            self.symbol.tolist(),
+            self.name.tolist(),
+            np.round(self.price, 2).tolist(),
+            self.market_cap.tolist(),
+            self.sector.tolist(),
+            self.direction().tolist()
+        ))
+
+
+def parse_preopen_payload(data, rng=None):
+    """Turn one market-data-pre-open JSON response into StockColumns
+
+    Each field is pulled out in a single pass into its own column; no per-row
+    dicts are built.
+    """
+    if not data or 'data' not in data:
+        return StockColumns.empty()
+
+    metadata = [item['metadata'] for item in data['data'] if 'metadata' in item]
+    count = len(metadata)
+    rng = rng or np.random.default_rng()
+
+    def text_column(key):
+        return np.array([meta.get(key) for meta in metadata], dtype=object)
+
+    def number_column(key):
+        # Missing values stay NaN: a missing price drops the row, a missing change
+        # leaves the direction for upsert_stocks to derive from the stored price
+        return np.fromiter(
+            (_to_float(meta.get(key)) for meta in metadata), dtype=np.float64, count=count
+        )
+
+    return StockColumns(
+        symbol=text_column('symbol'),
+        name=text_column('companyName'),
+        sector=text_column('industry'),
+        price=number_column('lastPrice'),
+        change=number_column('change'),
+        market_cap=rng.integers(*PLACEHOLDER_MARKET_CAP, size=count, dtype=np.int64)
+    ).validated()
+
+
+def parse_all_indices_payload(data, names=None):
+    """Turn one allIndices JSON response into IndexQuote records
+
+    names limits the result to those index names (matched case-insensitively);
+    None keeps every index in the response. Entries that fail validation are skipped.
+    """
+    if not data or 'data' not in data:
+        return []
+    wanted = None if names is None else {name.upper() for name in names}
+    quotes = []
+    for item in data['data']:
+        name = item.get('index') or item.get('indexSymbol')
+        if not name or (wanted is not None and name.upper() not in wanted):
+            continue
+        try:
+            quotes.append(IndexQuote.create(
+                index_id_for(name), name, item.get('last'), item.get('variation'), item.get('percentChange')
+            ))
+        except RecordError:
+            continue
+    return quotes
@@ -0,0 +1,104 @@
+import os
+import time
+from deadline import Deadline, DeadlineExceeded
+from log_config import get_logger
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+MAX_WORKERS = int(os.getenv('BOT_MAX_WORKERS', '3'))
+BOT_TIMEOUT_SECONDS = float(os.getenv('BOT_TIMEOUT_SECONDS', '120'))
+# How long drain() gives timed-out bots to reach their next deadline check and stop
+BOT_DRAIN_SECONDS = float(os.getenv('BOT_DRAIN_SECONDS', '30'))
+
+logger = get_logger("orchestrator")
+
+
+class BotOrchestrator:
+    """Run bots concurrently on a bounded thread pool with per-bot timeouts
+
+    Database writes stay serialized through database.WRITE_LOCK, so bots only
+    overlap on their network and parsing work.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, bot_timeout=BOT_TIMEOUT_SECONDS):
+        self.max_workers = max_workers
+        self.bot_timeout = bot_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bot")
+        # Futures of bots that timed out and are still winding down
+        self.timed_out = set()
+
+    def _run_bot(self, bot, started, deadlines):
+        deadlines[bot.bot_name] = Deadline(self.bot_timeout)
+        started[bot.bot_name] = time.time()
+        bot.run(deadline=deadlines[bot.bot_name])
+
+    def run_cycle(self, bots):
+        """Run every bot once and return a per-bot summary of the cycle"""
+        cycle_start = time.time()
+        started = {}
+        deadlines = {}
+        futures = {self.executor.submit(self._run_bot, bot, started, deadlines): bot for bot in bots}
+        results = {}
+        pending = set(futures)
+
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                bot = futures[future]
+                elapsed = round(time.time() - started.get(bot.bot_name, cycle_start), 2)
+                error = future.exception()
+                if error is None:
+                    status = "Success"
+                else:
+                    # A bot that stopped at an expired deadline timed out rather than failed
+                    status = "Timeout" if isinstance(error, DeadlineExceeded) else "Failure"
+                results[bot.bot_name] = {
+                    "status": status,
+                    "seconds": elapsed,
+                    "error": str(error) if error else None
+                }
+
+            # A worker thread cannot be killed, so a bot that overruns is reported as
+            # timed out, its deadline is cancelled so it can wind down at the next check,
+            # and it finishes in the background without holding up the cycle.
+            now = time.time()
+            for future in list(pending):
+                bot = futures[future]
+                bot_started = started.get(bot.bot_name)
+                if bot_started is not None and now - bot_started > self.bot_timeout:
+                    pending.discard(future)
+                    self.timed_out.add(future)
+                    deadlines[bot.bot_name].cancel()
+                    results[bot.bot_name] = {
+                        "status": "Timeout",
+                        "seconds": round(now - bot_started, 2),
+                        "error": f"Exceeded {self.bot_timeout} second timeout"
+                    }
+
+        wall_clock = round(time.time() - cycle_start, 2)
+        self.print_summary(results, wall_clock)
+        return {"wall_clock": wall_clock, "bots": results}
+
+    def print_summary(self, results, wall_clock):
+        busy_time = round(sum(result["seconds"] for result in results.values()), 2)
+        logger.info("Bot cycle finished in %s seconds (%s seconds of bot time)", wall_clock, busy_time)
+        for bot_name, result in results.items():
+            if result["error"]:
+                logger.info("  %s: %s in %s seconds - %s", bot_name, result["status"], result["seconds"], result["error"])
+            else:
+                logger.info("  %s: %s in %s seconds", bot_name, result["status"], result["seconds"])
+
+    def drain(self, timeout=BOT_DRAIN_SECONDS):
+        """Wait up to timeout seconds for timed-out bots to stop; True when none is left running
+
+        Call before closing the log writer, change feed or pool: a cancelled bot still
+        logs its outcome, and would otherwise do so into resources already closed.
+        """
+        if not self.timed_out:
+            return True
+        _, self.timed_out = wait(self.timed_out, timeout=timeout)
+        if self.timed_out:
+            logger.warning("%d timed-out bot(s) still running after %s seconds", len(self.timed_out), timeout)
+        return not self.timed_out
+
+    def shutdown(self, wait_for_bots=True):
+        self.executor.shutdown(wait=wait_for_bots)
@@ -0,0 +1,174 @@
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', str(min(4, os.cpu_count() or 1))))
+PARSE_RECYCLE_AFTER = int(os.getenv('PARSE_RECYCLE_AFTER', '200'))
+
+# Lower-cased column headings used by NSE market-data tables
+SYMBOL_HEADERS = ("symbol",)
+NAME_HEADERS = ("company name", "company", "name")
+PRICE_HEADERS = ("ltp", "last price", "lastprice", "price")
+CHANGE_HEADERS = ("chng", "change", "net chng")
+SECTOR_HEADERS = ("industry", "sector")
+
+NUMBER_NOISE = re.compile(r"[^0-9.\-]")
+
+# Workers must not be forked from the bots' process: by the time a pool starts it
+# runs the log listener, bot, fetch and scrape threads, and a fork copies their
+# held locks. forkserver forks from a clean single-threaded server instead.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class _TableExtractor(HTMLParser):
+    """Collect the text of every <table> as a list of rows of cell strings"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.tables.append([])
+        elif tag == "tr" and self.tables:
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self._cell is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            if self._row:
+                self.tables[-1].append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def _markdown_tables(text):
+    tables, current = [], []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("|"):
+            cells = [cell.strip() for cell in line.strip("|").split("|")]
+            # Skip the |---|---| separator under the header
+            if not all(set(cell) <= set("-: ") for cell in cells):
+                current.append(cells)
+        elif current:
+            tables.append(current)
+            current = []
+    if current:
+        tables.append(current)
+    return tables
+
+
+def _find_column(header, candidates):
+    for index, label in enumerate(header):
+        if label.lower() in candidates:
+            return index
+    return None
+
+
+def _number(text):
+    cleaned = NUMBER_NOISE.sub("", text)
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def parse_document(document):
+    """Extract (symbol, name, sector, price, change) tuples from a scraped HTML or markdown page
+
+    Runs inside pool workers, so it takes and returns only plain picklable values.
+    """
+    if not document:
+        return []
+    if "<table" in document:
+        extractor = _TableExtractor()
+        extractor.feed(document)
+        tables = extractor.tables
+    else:
+        tables = _markdown_tables(document)
+
+    rows = []
+    for table in tables:
+        if len(table) < 2:
+            continue
+        header = table[0]
+        symbol_column = _find_column(header, SYMBOL_HEADERS)
+        price_column = _find_column(header, PRICE_HEADERS)
+        if symbol_column is None or price_column is None:
+            continue
+        name_column = _find_column(header, NAME_HEADERS)
+        change_column = _find_column(header, CHANGE_HEADERS)
+        sector_column = _find_column(header, SECTOR_HEADERS)
+        width = len(header)
+        for cells in table[1:]:
+            if len(cells) < width:
+                continue
+            price = _number(cells[price_column])
+            if price is None or not cells[symbol_column]:
+                continue
+            symbol = cells[symbol_column].upper()
+            rows.append((
+                symbol,
+                cells[name_column] if name_column is not None else symbol,
+                cells[sector_column] if sector_column is not None else "Unknown",
+                price,
+                _number(cells[change_column]) if change_column is not None else None
+            ))
+    return rows
+
+
+class ParsePool:
+    """Bounded process pool that parses scraped documents off the bots' threads
+
+    Documents go to worker processes and compact row tuples stream back in
+    submission order; database writes stay with the caller. Workers are
+    replaced after recycle_after documents so parser memory cannot build up.
+    """
+
+    def __init__(self, workers=PARSE_WORKERS, recycle_after=PARSE_RECYCLE_AFTER):
+        self.workers = workers
+        self.recycle_after = recycle_after
+        self._executor = None
+        self._submitted = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self, count):
+        with self._lock:
+            if self._executor is not None and self._submitted + count > self.recycle_after:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(START_METHOD)
+                )
+                self._submitted = 0
+            self._submitted += count
+            return self._executor
+
+    def parse(self, documents):
+        """Yield the row list of each document, in order"""
+        documents = list(documents)
+        if not documents:
+            return iter(())
+        if self.workers <= 1:
+            return map(parse_document, documents)
+        return self._get_executor(len(documents)).map(parse_document, documents)
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
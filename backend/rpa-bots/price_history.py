@@ -0,0 +1,99 @@
+import os
+import time
+
+from database import Database
+from log_config import get_logger
+
+# Ticks older than this many days are dropped by PriceHistoryRetention; 0 keeps everything
+PRICE_HISTORY_RETENTION_DAYS = float(os.getenv('PRICE_HISTORY_RETENTION_DAYS', '90'))
+
+logger = get_logger("price_history")
+
+
+class PriceHistory:
+    """Append-only price history for stocks and indices stored in price_ticks
+
+    Each series (a stock symbol or an index id) keeps one row per tick keyed on
+    (series, ts) with integer unix-second timestamps, in a WITHOUT ROWID table so
+    the primary key is the only b-tree. Bots append only the rows they actually
+    changed, so the table grows with market activity rather than with polling.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def append(self, ticks, timestamp=None):
+        """Record many (series, price) ticks at one timestamp (defaults to now)"""
+        ts = int(timestamp if timestamp is not None else time.time())
+        insert_query = """
+        INSERT INTO price_ticks (series, ts, price)
+        VALUES (?, ?, ?)
+        ON CONFLICT(series, ts) DO UPDATE SET price = excluded.price
+        """
+        return self.db.write_many(
+            insert_query,
+            ((series, ts, price) for series, price in ticks),
+            "price ticks"
+        )
+
+    def ticks(self, series, start, end):
+        """Return [(ts, price)] for series with start <= ts < end, oldest first"""
+        if not self.db.connection or not self.db.cursor:
+            logger.error("Database not connected")
+            return []
+        self.db.execute(
+            "SELECT ts, price FROM price_ticks WHERE series = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (series, int(start), int(end))
+        )
+        return self.db.cursor.fetchall()
+
+    def ohlc(self, series, start, end, bucket_seconds):
+        """Downsample a range into [(bucket_start, open, high, low, close, ticks)] candles"""
+        candles = []
+        for ts, price in self.ticks(series, start, end):
+            bucket = ts - ts % bucket_seconds
+            if candles and candles[-1][0] == bucket:
+                bucket_start, open_, high, low, _, count = candles[-1]
+                candles[-1] = (bucket_start, open_, max(high, price), min(low, price), price, count + 1)
+            else:
+                candles.append((bucket, price, price, price, price, 1))
+        return candles
+
+    def latest(self, series):
+        """Return the most recent (ts, price) for series, or None"""
+        if not self.db.connection or not self.db.cursor:
+            logger.error("Database not connected")
+            return None
+        self.db.execute(
+            "SELECT ts, price FROM price_ticks WHERE series = ? ORDER BY ts DESC LIMIT 1",
+            (series,)
+        )
+        return self.db.cursor.fetchone()
+
+    def prune(self, before):
+        """Drop ticks older than the given unix timestamp and return how many went"""
+        with self.db.transaction():
+            self.db.execute("DELETE FROM price_ticks WHERE ts < ?", (int(before),))
+            return self.db.cursor.rowcount
+
+
+class PriceHistoryRetention:
+    """Scheduled job that prunes price_ticks to the last retention_days days
+
+    Runs on a BotSchedule like the bots, so it takes the same run(deadline) call,
+    but writes no bot_logs rows of its own.
+    """
+
+    bot_name = "Price History Retention"
+
+    def __init__(self, retention_days=PRICE_HISTORY_RETENTION_DAYS, db=None):
+        self.retention_days = retention_days
+        self.db = db or Database(label=self.bot_name)
+        self.price_history = PriceHistory(self.db)
+
+    def run(self, deadline=None):
+        before = time.time() - self.retention_days * 24 * 60 * 60
+        with self.db:
+            removed = self.price_history.prune(before)
+        logger.info("Pruned %d price ticks older than %g days", removed, self.retention_days)
+        return removed
@@ -0,0 +1,82 @@
+import math
+from typing import NamedTuple, Optional
+
+class RecordError(ValueError):
+    pass
+
+
+def _text(value, field):
+    text = str(value if value is not None else "").strip()
+    if not text:
+        raise RecordError(f"{field} is empty")
+    return text
+
+
+def _number(value, field):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise RecordError(f"{field} is not a number: {value!r}") from None
+    if not math.isfinite(number):
+        raise RecordError(f"{field} is not finite: {value!r}")
+    return number
+
+
+# Each record lists its fields in the column order of its table and is a tuple,
+# so a list of records goes to Database.write_many / executemany unchanged.
+# Construct them with create() where the values come from outside (parsers,
+# disclosures); that is the one place they are checked. Stocks arrive in bulk
+# and are checked column-wise by StockColumns.validated() instead.
+
+class Stock(NamedTuple):
+    """One stocks row"""
+    id: str
+    symbol: str
+    name: str
+    price: float
+    market_cap: int
+    sector: str
+    price_change_direction: Optional[str] = None
+
+
+class IndexQuote(NamedTuple):
+    """One indices row"""
+    id: str
+    name: str
+    value: float
+    change: float
+    percent_change: float
+
+    @classmethod
+    def create(cls, id, name, value, change, percent_change):
+        return cls(
+            _text(id, "id"), _text(name, "name"), round(_number(value, "value"), 2),
+            round(_number(change or 0, "change"), 2), round(_number(percent_change or 0, "percent_change"), 2)
+        )
+
+
+class Fund(NamedTuple):
+    """One mutual_funds row"""
+    id: str
+    name: str
+    amc: str
+    category: str
+
+    @classmethod
+    def create(cls, id, name, amc, category):
+        return cls(_text(id, "id"), _text(name, "name"), _text(amc, "amc"), str(category or "Unknown").strip())
+
+
+class Holding(NamedTuple):
+    """One fund_holdings row"""
+    fund_id: str
+    stock_id: str
+    percentage: float
+
+    @classmethod
+    def create(cls, fund_id, stock_id, percentage):
+        percentage = round(_number(percentage, "percentage"), 2)
+        # Hedged derivative positions show up as small negative weights
+        if not -100 <= percentage <= 100:
+            raise RecordError(f"percentage out of range: {percentage}")
+        return cls(_text(fund_id, "fund_id"), _text(stock_id, "stock_id"), percentage)
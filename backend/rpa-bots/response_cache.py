@@ -0,0 +1,174 @@
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlencode
+
+from log_config import get_logger
+
+# Gzipped JSON file the cache survives restarts in; empty to keep it in memory only
+RESPONSE_CACHE_FILE = os.getenv('RESPONSE_CACHE_FILE', '.cache/responses.json.gz')
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256'))
+# Responses younger than this are served without a request
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '20'))
+# Older responses are still served when the source fails, up to this age
+RESPONSE_CACHE_MAX_STALE = float(os.getenv('RESPONSE_CACHE_MAX_STALE', str(24 * 60 * 60)))
+# The file is rewritten at most this often; close_response_cache() writes out the rest
+RESPONSE_CACHE_FLUSH_SECONDS = float(os.getenv('RESPONSE_CACHE_FLUSH_SECONDS', '60'))
+
+logger = get_logger("response_cache")
+
+
+class CachedResponse:
+    __slots__ = ("data", "stored_at", "etag", "last_modified")
+
+    def __init__(self, data, stored_at, etag=None, last_modified=None):
+        self.data = data
+        self.stored_at = stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def age(self, now=None):
+        return (now or time.time()) - self.stored_at
+
+
+class ResponseCache:
+    """LRU cache of last-good source responses keyed by URL and params
+
+    Entries keep the validators (ETag / Last-Modified) the source sent so stale
+    ones can be revalidated with a conditional request. The cache is loaded from
+    and flushed to a single gzipped JSON file so a restarted process starts warm.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_FILE, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 ttl=RESPONSE_CACHE_TTL, max_stale=RESPONSE_CACHE_MAX_STALE,
+                 flush_interval=RESPONSE_CACHE_FLUSH_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.flush_interval = flush_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self.load()
+
+    @staticmethod
+    def key(url, params=None):
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def get(self, key):
+        """Return the entry for key, or None when missing or too old to serve even as stale"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.age() > self.max_stale:
+                del self._entries[key]
+                self._dirty = True
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry):
+        return entry is not None and entry.age() < self.ttl
+
+    def put(self, key, data, etag=None, last_modified=None):
+        with self._lock:
+            self._entries[key] = CachedResponse(data, time.time(), etag, last_modified)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def touch(self, key):
+        """Restart the freshness window of an entry the source confirmed unchanged"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.stored_at = time.time()
+                self._dirty = True
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as cache_file:
+                stored = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable response cache %s: %s", self.path, e)
+            return
+        with self._lock:
+            # Stored least recently used first, so insertion order restores the LRU order
+            for key, data, stored_at, etag, last_modified in stored[-self.max_entries:]:
+                self._entries[key] = CachedResponse(data, stored_at, etag, last_modified)
+
+    def flush(self, force=False):
+        """Atomically rewrite the cache file if anything changed since the last flush
+
+        Unless forced, the file is rewritten at most once per flush_interval; a
+        full cache of pre-open payloads takes a noticeable fraction of a second.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            if not force and time.monotonic() - self._last_flush < self.flush_interval:
+                return
+            self._last_flush = time.monotonic()
+            stored = [
+                [key, entry.data, entry.stored_at, entry.etag, entry.last_modified]
+                for key, entry in self._entries.items()
+            ]
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with gzip.open(temp_path, "wt", encoding="utf-8") as cache_file:
+                json.dump(stored, cache_file, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+        except (OSError, TypeError) as e:
+            logger.error("Error writing response cache %s: %s", self.path, e)
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide response cache, loading it from disk on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def flush_response_cache():
+    """Write out the cache if it changed and the flush interval has passed"""
+    if _cache is not None:
+        _cache.flush()
+
+
+def close_response_cache():
+    """Write out every change since the last flush; call at shutdown"""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.flush(force=True)
+            _cache = None
+
+
+# Bots run on their own (python indices_bot.py) never call close_response_cache()
+atexit.register(close_response_cache)
@@ -1,40 +1,49 @@
+import os
 from nse_bot import NSEBot
 from amc_bot import AMCBot
 from indices_bot import IndicesBot
-import time
+from bot_log_writer import close_bot_log_writer
+from change_feed import close_change_feed
+from database import close_pool
+import log_config
+from log_config import get_logger
+from orchestrator import BotOrchestrator
+from response_cache import close_response_cache
+
+logger = get_logger("run_bots")
 
 def run_all_bots():
-    """Run all RPA bots sequentially"""
-    print("Starting all RPA bots...")
-    
-    # Run NSE Bot
-    try:
-        nse_bot = NSEBot()
-        nse_bot.run()
-    except Exception as e:
-        print(f"NSE Bot failed: {e}")
-    
-    # Wait a bit between bots
-    time.sleep(2)
+    """Run all RPA bots concurrently; returns False when a bot could not be stopped"""
+    logger.info("Starting all RPA bots...")
     
-    # Run AMC Bot
-    try:
-        amc_bot = AMCBot()
-        amc_bot.run()
-    except Exception as e:
-        print(f"AMC Bot failed: {e}")
+    bots = []
+    for bot_class in (NSEBot, AMCBot, IndicesBot):
+        try:
+            bots.append(bot_class())
+        except Exception as e:
+            logger.error("%s failed to start: %s", bot_class.__name__, e)
     
-    # Wait a bit between bots
-    time.sleep(2)
+    # Bots overlap their scraping; database writes are serialized by the Database layer
+    orchestrator = BotOrchestrator()
+    orchestrator.run_cycle(bots)
+    # Timed-out bots have been cancelled but only stop at their next deadline check;
+    # wait for them (within a bound) so their bot_logs rows and feed events are kept
+    stopped = orchestrator.drain()
+    orchestrator.shutdown(wait_for_bots=stopped)
     
-    # Run Indices Bot
-    try:
-        indices_bot = IndicesBot()
-        indices_bot.run()
-    except Exception as e:
-        print(f"Indices Bot failed: {e}")
+    # Bots share the process-wide connection pool; close it once every bot is done
+    # and the queued bot_logs rows have been written
+    close_bot_log_writer()
+    close_change_feed()
+    close_response_cache()
+    close_pool()
     
-    print("All RPA bots completed.")
+    logger.info("All RPA bots completed.")
+    return stopped
 
 if __name__ == "__main__":
-    run_all_bots()
\ No newline at end of file
+    if not run_all_bots():
+        # A stuck bot's worker thread cannot be killed and would hold up interpreter
+        # exit indefinitely; everything it shares has been closed, so leave now
+        log_config.shutdown()
+        os._exit(1)
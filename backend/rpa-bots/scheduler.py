@@ -0,0 +1,153 @@
+import os
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from amc_bot import AMCBot
+from bot_log_writer import close_bot_log_writer
+from change_feed import close_change_feed
+from database import close_pool
+import metrics
+from deadline import Deadline
+from indices_bot import IndicesBot
+from log_config import get_logger
+from nse_bot import NSEBot
+from orchestrator import BOT_TIMEOUT_SECONDS
+from price_history import PRICE_HISTORY_RETENTION_DAYS, PriceHistoryRetention
+from response_cache import close_response_cache, flush_response_cache
+
+# NSE trades 09:15-15:30 IST on weekdays; the pre-open session starts at 09:00.
+# IST has no daylight saving, so a fixed offset is exact.
+IST = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN = (9, 0)
+MARKET_CLOSE = (15, 30)
+# Comma separated YYYY-MM-DD exchange holidays
+NSE_HOLIDAYS = {day.strip() for day in os.getenv('NSE_HOLIDAYS', '').split(',') if day.strip()}
+
+NSE_BOT_INTERVAL = float(os.getenv('NSE_BOT_INTERVAL', '30'))
+INDICES_BOT_INTERVAL = float(os.getenv('INDICES_BOT_INTERVAL', '30'))
+AMC_BOT_INTERVAL = float(os.getenv('AMC_BOT_INTERVAL', str(24 * 60 * 60)))
+PRICE_HISTORY_PRUNE_INTERVAL = float(os.getenv('PRICE_HISTORY_PRUNE_INTERVAL', str(24 * 60 * 60)))
+BOT_JITTER_SECONDS = float(os.getenv('BOT_JITTER_SECONDS', '3'))
+IGNORE_MARKET_HOURS = os.getenv('SCHEDULER_IGNORE_MARKET_HOURS', '').lower() in ('1', 'true', 'yes')
+
+logger = get_logger("scheduler")
+
+
+def market_is_open(now=None):
+    now = (now or datetime.now(IST)).astimezone(IST)
+    if now.weekday() >= 5 or now.strftime('%Y-%m-%d') in NSE_HOLIDAYS:
+        return False
+    return MARKET_OPEN <= (now.hour, now.minute) < MARKET_CLOSE
+
+
+class BotSchedule:
+    """Cadence and run state of one warm bot instance"""
+
+    def __init__(self, bot, interval, jitter=BOT_JITTER_SECONDS, market_hours_only=False):
+        self.bot = bot
+        self.interval = interval
+        self.jitter = jitter
+        self.market_hours_only = market_hours_only
+        self.next_run = time.monotonic()
+        self.future = None
+        self.deadline = None
+        self.started = None
+
+    def schedule_next(self, now):
+        # Jitter keeps bots that share a cadence from hitting NSE in lockstep
+        self.next_run = now + self.interval + random.uniform(-self.jitter, self.jitter)
+
+    @property
+    def running(self):
+        return self.future is not None and not self.future.done()
+
+
+class BotScheduler:
+    """Long-running daemon that keeps bots and database connections warm between runs
+
+    Each bot runs on its own cadence. A run that is still going when the next one
+    is due causes that slot to be skipped rather than stacked, and bots limited to
+    market hours sit idle outside the NSE session.
+    """
+
+    def __init__(self, schedules, bot_timeout=BOT_TIMEOUT_SECONDS, tick=0.5):
+        self.schedules = schedules
+        self.bot_timeout = bot_timeout
+        self.tick = tick
+        self.executor = ThreadPoolExecutor(max_workers=len(schedules), thread_name_prefix="scheduled-bot")
+        self._stop = threading.Event()
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def _start(self, schedule, now):
+        schedule.deadline = Deadline(self.bot_timeout)
+        schedule.started = now
+        schedule.future = self.executor.submit(schedule.bot.run, schedule.deadline)
+        schedule.future.add_done_callback(lambda future, name=schedule.bot.bot_name: self._finished(name, future))
+
+    def _finished(self, bot_name, future):
+        # BaseBot.run already logs the outcome; only keep the exception from going unseen
+        if future.exception() is not None:
+            logger.error("%s run failed: %s", bot_name, future.exception())
+
+    def run_pending(self, now=None):
+        now = time.monotonic() if now is None else now
+        for schedule in self.schedules:
+            if schedule.running and now - schedule.started > self.bot_timeout:
+                schedule.deadline.cancel()
+            if now < schedule.next_run:
+                continue
+            schedule.schedule_next(now)
+            if schedule.market_hours_only and not IGNORE_MARKET_HOURS and not market_is_open():
+                continue
+            if schedule.running:
+                logger.warning("%s still running, skipping this run", schedule.bot.bot_name)
+                continue
+            self._start(schedule, now)
+
+    def run_forever(self):
+        logger.info("Started with %d bots", len(self.schedules))
+        while not self._stop.is_set():
+            self.run_pending()
+            # Rewriting the response cache file happens here rather than on a bot's thread
+            flush_response_cache()
+            self._stop.wait(self.tick)
+        logger.info("Stopping, waiting for running bots")
+        for schedule in self.schedules:
+            if schedule.deadline is not None:
+                schedule.deadline.cancel()
+        self.executor.shutdown(wait=True)
+        close_bot_log_writer()
+        close_change_feed()
+        close_response_cache()
+        close_pool()
+        logger.info("Stopped")
+
+
+def default_schedules():
+    schedules = []
+    for bot_class, interval, market_hours_only in (
+        (NSEBot, NSE_BOT_INTERVAL, True),
+        (IndicesBot, INDICES_BOT_INTERVAL, True),
+        (AMCBot, AMC_BOT_INTERVAL, False),
+    ):
+        try:
+            schedules.append(BotSchedule(bot_class(), interval, market_hours_only=market_hours_only))
+        except Exception as e:
+            logger.error("%s failed to start: %s", bot_class.__name__, e)
+    if PRICE_HISTORY_RETENTION_DAYS > 0:
+        schedules.append(BotSchedule(PriceHistoryRetention(), PRICE_HISTORY_PRUNE_INTERVAL))
+    return schedules
+
+
+if __name__ == "__main__":
+    metrics.start_server()
+    scheduler = BotScheduler(default_schedules())
+    signal.signal(signal.SIGINT, scheduler.stop)
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    scheduler.run_forever()
@@ -0,0 +1,48 @@
+import threading
+
+
+class SnapshotCache:
+    """In-process copy of the last persisted row for each key
+
+    Bots diff every scrape against it so only rows whose tracked fields changed
+    are sent to Database, and record the rows once their transaction commits.
+    Rows are plain tuples in the same layout the Database write methods take.
+    """
+
+    def __init__(self, key_index, compare_indexes):
+        self.key_index = key_index
+        self.compare_indexes = tuple(compare_indexes)
+        self.rows = {}
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, rows):
+        """Warm the cache from rows read back from the database"""
+        with self._lock:
+            self.rows = {row[self.key_index]: tuple(row) for row in rows}
+            self.loaded = True
+
+    def get(self, key):
+        return self.rows.get(key)
+
+    def _values(self, row):
+        return tuple(row[index] for index in self.compare_indexes)
+
+    def changed(self, rows):
+        """Return the rows that are new or differ from the last written version"""
+        changed_rows = []
+        with self._lock:
+            for row in rows:
+                previous = self.rows.get(row[self.key_index])
+                if previous is None or self._values(previous) != self._values(row):
+                    changed_rows.append(row)
+        return changed_rows
+
+    def update(self, rows):
+        """Record rows as persisted; call only after the write has committed"""
+        with self._lock:
+            for row in rows:
+                self.rows[row[self.key_index]] = tuple(row)
+
+    def __len__(self):
+        return len(self.rows)
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from change_feed import ChangeFeed, read_changes
+from records import IndexQuote
+
+
+class ChangeFeedTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix="change-feed-test-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, "changes.jsonl")
+
+    def feed(self, **kwargs):
+        feed = ChangeFeed(self.path, **kwargs)
+        self.addCleanup(feed.close)
+        return feed
+
+    def test_events_carry_consecutive_sequence_numbers(self):
+        feed = self.feed()
+        self.assertEqual(feed.publish("index", [IndexQuote("idx1", "NIFTY 50", 1.0, 0.5, 0.1)] * 3), 3)
+        events = list(read_changes(0, self.path))
+        self.assertEqual([event["seq"] for event in events], [1, 2, 3])
+        self.assertEqual(events[0]["type"], "index")
+        self.assertEqual(events[0]["data"], {
+            "id": "idx1", "name": "NIFTY 50", "value": 1.0, "change": 0.5, "percent_change": 0.1
+        })
+
+    def test_read_changes_skips_what_the_consumer_has_seen(self):
+        feed = self.feed()
+        feed.publish("holding", [{"fund_id": "f", "stock_id": str(i), "percentage": 1.0} for i in range(5)])
+        self.assertEqual([event["seq"] for event in read_changes(3, self.path)], [4, 5])
+
+    def test_sequence_continues_after_a_restart(self):
+        self.feed().publish("holding", [{"fund_id": "f", "stock_id": "a", "percentage": 1.0}] * 2)
+        self.feed().publish("holding", [{"fund_id": "f", "stock_id": "b", "percentage": 1.0}])
+        self.assertEqual([event["seq"] for event in read_changes(0, self.path)], [1, 2, 3])
+
+    def test_sequence_continues_across_rotation_and_writers(self):
+        first, second = self.feed(max_bytes=300), self.feed(max_bytes=300)
+        for i in range(40):
+            (first if i % 2 else second).publish("holding", [{"fund_id": "f", "stock_id": str(i), "percentage": 1.0}])
+        self.assertTrue(os.path.exists(f"{self.path}.1"))
+        sequences = [event["seq"] for event in read_changes(0, self.path)]
+        self.assertEqual(sequences[-1], 40)
+        self.assertEqual(sequences, list(range(sequences[0], 41)))
+
+    def test_empty_path_disables_the_feed(self):
+        feed = ChangeFeed("")
+        self.assertFalse(feed.enabled)
+        self.assertEqual(feed.publish("index", [{"id": "idx1"}]), 0)
+
+    def test_unterminated_last_line_is_not_read(self):
+        self.feed().publish("holding", [{"fund_id": "f", "stock_id": "a", "percentage": 1.0}])
+        with open(self.path, "ab") as feed_file:
+            feed_file.write(b'{"seq":2,"ts":0,"ty')
+        self.assertEqual([event["seq"] for event in read_changes(0, self.path)], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
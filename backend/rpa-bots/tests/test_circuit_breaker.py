@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patches = (
+            mock.patch.object(circuit_breaker.time, "monotonic", self.clock),
+            # No jitter, so cool-downs end exactly when expected
+            mock.patch.object(circuit_breaker.random, "uniform", return_value=0.0),
+        )
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10, max_reset_timeout=25)
+
+    def fail(self, times=1):
+        for _ in range(times):
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold_consecutive_failures(self):
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+        self.fail()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertFalse(self.breaker.available())
+
+    def test_success_resets_the_failure_count(self):
+        self.fail(2)
+        self.breaker.record_success()
+        self.fail(2)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_call_raises_circuit_open_without_calling(self):
+        self.fail(3)
+        source = mock.Mock()
+        with self.assertRaises(CircuitOpen):
+            self.breaker.call(source)
+        source.assert_not_called()
+
+    def test_half_open_lets_a_single_probe_through(self):
+        self.fail(3)
+        self.clock.now += 10
+        self.assertTrue(self.breaker.available())
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_successful_probe_closes_the_circuit(self):
+        self.fail(3)
+        self.clock.now += 10
+        self.assertEqual(self.breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.cooldown, 10)
+
+    def test_failed_probes_double_the_cooldown_up_to_the_cap(self):
+        self.fail(3)
+        for expected in (20, 25, 25):
+            self.clock.now += self.breaker.cooldown
+            self.assertTrue(self.breaker.allow())
+            self.fail()
+            self.assertEqual(self.breaker.state, OPEN)
+            self.assertEqual(self.breaker.cooldown, expected)
+            self.clock.now += expected - 1
+            self.assertFalse(self.breaker.available())
+            self.clock.now -= expected - 1
+
+
+if __name__ == "__main__":
+    unittest.main()
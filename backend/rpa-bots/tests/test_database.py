@@ -0,0 +1,176 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from database import ConnectionPool, Database
+from db_backends import SQLiteBackend
+from records import Stock
+
+# The tables as TypeORM's synchronize creates them from the backend's entities
+SCHEMA = """
+CREATE TABLE stocks (
+    id varchar PRIMARY KEY NOT NULL, symbol varchar NOT NULL UNIQUE, name varchar NOT NULL,
+    price decimal(10,2) NOT NULL, market_cap bigint NOT NULL, sector varchar NOT NULL,
+    price_change_direction varchar
+);
+CREATE TABLE mutual_funds (
+    id varchar PRIMARY KEY NOT NULL, name varchar NOT NULL, amc varchar NOT NULL, category varchar NOT NULL
+);
+CREATE TABLE fund_holdings (
+    fund_id varchar NOT NULL, stock_id varchar NOT NULL, percentage decimal(5,2) NOT NULL,
+    PRIMARY KEY (fund_id, stock_id)
+);
+CREATE TABLE indices (
+    id varchar PRIMARY KEY NOT NULL, name varchar NOT NULL, value decimal(12,2) NOT NULL,
+    change decimal(12,2) NOT NULL, percent_change decimal(5,2) NOT NULL
+);
+"""
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Runs each test against a fresh SQLite file holding the backend's tables"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix="database-test-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, "database.sqlite")
+        with sqlite3.connect(self.path) as connection:
+            connection.executescript(SCHEMA)
+        connection.close()
+        self.pool = ConnectionPool(SQLiteBackend(self.path), max_size=2)
+        self.addCleanup(self.pool.close)
+        self.db = Database(self.pool, label="test")
+
+    def stored(self, query):
+        """Read through a separate connection, so only committed rows are seen"""
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute(query).fetchall()
+        finally:
+            connection.close()
+
+
+class TransactionTest(DatabaseTestCase):
+    def test_writes_commit_together_at_the_end(self):
+        with self.db.transaction():
+            self.db.add_stocks([("s1", "AAA", "A Ltd", 10.0, 1, "Energy")])
+            self.assertEqual(self.stored("SELECT id FROM stocks"), [])
+            self.db.add_stocks([("s2", "BBB", "B Ltd", 20.0, 1, "Energy")])
+        self.assertEqual(self.stored("SELECT id FROM stocks ORDER BY id"), [("s1",), ("s2",)])
+
+    def test_nested_transaction_commits_with_the_outermost(self):
+        with self.db.transaction():
+            with self.db.transaction():
+                self.db.add_stocks([("s1", "AAA", "A Ltd", 10.0, 1, "Energy")])
+            self.assertEqual(self.stored("SELECT id FROM stocks"), [])
+        self.assertEqual(self.stored("SELECT id FROM stocks"), [("s1",)])
+
+    def test_failure_in_a_nested_transaction_rolls_back_the_whole_batch(self):
+        with self.assertRaises(RuntimeError), self.assertLogs("rpa.database", "WARNING"):
+            with self.db.transaction():
+                self.db.add_stocks([("s1", "AAA", "A Ltd", 10.0, 1, "Energy")])
+                with self.db.transaction():
+                    self.db.add_stocks([("s2", "BBB", "B Ltd", 20.0, 1, "Energy")])
+                    raise RuntimeError("scrape failed")
+        self.assertEqual(self.stored("SELECT id FROM stocks"), [])
+
+    def test_failed_write_raises_inside_a_transaction(self):
+        with self.assertRaises(sqlite3.IntegrityError), self.assertLogs("rpa.database", "ERROR"):
+            with self.db.transaction():
+                self.db.add_stocks([("s1", "AAA", "A Ltd", 10.0, 1, "Energy")])
+                self.db.add_stocks([("s2", "AAA", "Duplicate", 20.0, 1, "Energy")])
+        self.assertEqual(self.stored("SELECT id FROM stocks"), [])
+
+    def test_failed_write_outside_a_transaction_is_rolled_back_and_reported(self):
+        with self.db, self.assertLogs("rpa.database", "ERROR") as logs:
+            self.assertEqual(self.db.add_stocks([("s1", "AAA", "A Ltd", 10.0, 1, "Energy")] * 2), 0)
+        self.assertIn("Error writing stocks", logs.output[0])
+        self.assertEqual(self.stored("SELECT id FROM stocks"), [])
+
+    def test_connection_returns_to_the_pool(self):
+        with self.db.transaction():
+            connection = self.db.connection
+        self.assertIsNone(self.db.connection)
+        acquired = self.pool.acquire()
+        self.addCleanup(self.pool.release, acquired)
+        self.assertIs(acquired, connection)
+
+
+class UpsertStocksTest(DatabaseTestCase):
+    def upsert(self, *stocks):
+        with self.db.transaction():
+            self.db.upsert_stocks(stocks)
+
+    def rows(self):
+        return self.stored("SELECT id, symbol, price, price_change_direction FROM stocks ORDER BY symbol")
+
+    def test_existing_symbols_keep_their_id(self):
+        self.upsert(Stock("s1", "AAA", "A Ltd", 10.0, 1, "Energy"))
+        self.upsert(Stock("s9", "AAA", "A Ltd", 12.0, 1, "Energy"), Stock("s2", "BBB", "B Ltd", 5.0, 1, "Energy"))
+        self.assertEqual(self.rows(), [("s1", "AAA", 12.0, "up"), ("s2", "BBB", 5.0, None)])
+        with self.db:
+            self.assertEqual(self.db.get_stock_ids(["AAA", "BBB", "CCC"]), {"AAA": "s1", "BBB": "s2"})
+
+    def test_direction_follows_the_stored_price_unless_given(self):
+        self.upsert(Stock("s1", "AAA", "A Ltd", 10.0, 1, "Energy"), Stock("s2", "BBB", "B Ltd", 10.0, 1, "Energy"))
+        self.upsert(Stock("s1", "AAA", "A Ltd", 9.5, 1, "Energy"), Stock("s2", "BBB", "B Ltd", 9.5, 1, "Energy", "up"))
+        self.assertEqual(self.rows(), [("s1", "AAA", 9.5, "down"), ("s2", "BBB", 9.5, "up")])
+
+    def test_unchanged_rows_are_left_untouched(self):
+        self.upsert(Stock("s1", "AAA", "A Ltd", 10.0, 1, "Energy"))
+        self.upsert(Stock("s1", "AAA", "A Ltd", 11.0, 1, "Energy"))
+        self.upsert(Stock("s1", "AAA", "A Ltd", 11.0, 1, "Energy"))
+        self.assertEqual(self.rows(), [("s1", "AAA", 11.0, "up")])
+        self.upsert(Stock("s1", "AAA", "A Ltd", 11.0, 1, "Banking"))
+        self.assertEqual(self.rows(), [("s1", "AAA", 11.0, "none")])
+        self.assertEqual(self.stored("SELECT sector FROM stocks"), [("Banking",)])
+
+
+class StockFundIndexTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with sqlite3.connect(self.path) as connection:
+            connection.executescript("""
+                INSERT INTO mutual_funds VALUES ('f1', 'Flexi Cap Fund', 'AMC One', 'Flexi Cap');
+                INSERT INTO mutual_funds VALUES ('f2', 'Large Cap Fund', 'AMC Two', 'Large Cap');
+                INSERT INTO fund_holdings VALUES ('f1', 's1', 4.5);
+                INSERT INTO fund_holdings VALUES ('f2', 's1', 7.0);
+            """)
+        connection.close()
+        # The pool's first connection builds the index from the holdings above
+        with self.assertLogs("rpa.db_backends", "INFO"), self.db:
+            pass
+
+    def funds_holding(self, stock_id, db=None):
+        db = db or self.db
+        with db:
+            return db.get_funds_holding_stock(stock_id)
+
+    def test_index_is_built_at_start_up(self):
+        self.assertEqual(self.funds_holding("s1"), [("Large Cap Fund", "AMC Two", 7.0), ("Flexi Cap Fund", "AMC One", 4.5)])
+
+    def test_holdings_written_elsewhere_are_resynced_at_the_next_start(self):
+        # As the API's addFundAndHoldings does: holdings only, no index rows
+        with sqlite3.connect(self.path) as connection:
+            connection.execute("INSERT INTO fund_holdings VALUES ('f1', 's2', 3.0)")
+        connection.close()
+        self.assertEqual(self.funds_holding("s2"), [])
+
+        restarted = ConnectionPool(SQLiteBackend(self.path), max_size=1)
+        self.addCleanup(restarted.close)
+        with self.assertLogs("rpa.db_backends", "INFO"):
+            self.assertEqual(self.funds_holding("s2", Database(restarted)), [("Flexi Cap Fund", "AMC One", 3.0)])
+
+    def test_refresh_replaces_the_rows_of_the_given_funds(self):
+        with self.db.transaction():
+            self.db.delete_fund_holdings(["f1"])
+            self.db.upsert_fund_holdings([("f1", "s2", 2.0)])
+            self.db.refresh_stock_fund_index(["f1"])
+        self.assertEqual(self.funds_holding("s1"), [("Large Cap Fund", "AMC Two", 7.0)])
+        self.assertEqual(self.funds_holding("s2"), [("Flexi Cap Fund", "AMC One", 2.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import deadline
+from deadline import Deadline, DeadlineExceeded
+
+
+class DeadlineTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 500.0
+        patch = mock.patch.object(deadline.time, "monotonic", lambda: self.now)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_unlimited_deadline_never_expires(self):
+        unlimited = Deadline()
+        self.assertIsNone(unlimited.remaining())
+        self.assertFalse(unlimited.expired)
+        self.assertEqual(unlimited.budget(30), 30)
+        unlimited.check()
+
+    def test_expires_after_its_seconds(self):
+        budget = Deadline(5)
+        self.now += 4
+        self.assertAlmostEqual(budget.remaining(), 1)
+        self.assertEqual(budget.budget(30), 1)
+        budget.check()
+        self.now += 1
+        self.assertTrue(budget.expired)
+        with self.assertRaises(DeadlineExceeded):
+            budget.check()
+
+    def test_cancel_expires_immediately(self):
+        budget = Deadline(60)
+        budget.cancel()
+        self.assertTrue(budget.cancelled)
+        self.assertEqual(budget.remaining(), 0.0)
+        with self.assertRaises(DeadlineExceeded):
+            budget.check()
+
+    def test_child_never_outlives_its_parent(self):
+        parent = Deadline(5)
+        child = parent.child(60)
+        self.assertEqual(child.remaining(), 5)
+        unlimited_child = parent.child()
+        self.assertEqual(unlimited_child.remaining(), 5)
+
+    def test_cancelling_the_parent_cancels_children(self):
+        parent = Deadline()
+        child = parent.child(60)
+        parent.cancel()
+        self.assertTrue(child.cancelled)
+        self.assertTrue(child.expired)
+
+
+class DeadlineSleepTest(unittest.TestCase):
+    def test_sleep_wakes_on_cancel(self):
+        budget = Deadline(30)
+        threading.Timer(0.05, budget.cancel).start()
+        start = time.monotonic()
+        budget.sleep(30)
+        self.assertLess(time.monotonic() - start, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+import disclosures
+from database import Database
+from disclosures import (
+    DisclosureIngestor, is_summary_row, iter_xlsx_rows, map_header, normalize_isin, parse_percentage
+)
+from test_database import DatabaseTestCase
+
+NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+RELS_NS = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+
+def write_xlsx(path, sheet_rows, shared_strings=(), sheet_path="xl/worksheets/sheet1.xml"):
+    """Write a minimal workbook whose first sheet holds the given <row> XML fragments"""
+    strings = "".join(f"<si><t>{text}</t></si>" for text in shared_strings)
+    with zipfile.ZipFile(path, "w") as workbook:
+        workbook.writestr("xl/workbook.xml", (
+            f'<workbook {NS} {RELS_NS}><sheets><sheet name="Portfolio" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ))
+        workbook.writestr("xl/_rels/workbook.xml.rels", (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Target="{sheet_path[len("xl/"):]}"/></Relationships>'
+        ))
+        workbook.writestr("xl/sharedStrings.xml", f"<sst {NS}>{strings}</sst>")
+        workbook.writestr(sheet_path, f"<worksheet {NS}><sheetData>{''.join(sheet_rows)}</sheetData></worksheet>")
+
+
+class NormalizeIsinTest(unittest.TestCase):
+    def test_valid_isins_are_normalised(self):
+        self.assertEqual(normalize_isin("INE002A01018"), "INE002A01018")
+        self.assertEqual(normalize_isin(" ine002a01018 "), "INE002A01018")
+        self.assertEqual(normalize_isin("US 0378331005"), "US0378331005")
+
+    def test_wrong_check_digit_is_rejected(self):
+        self.assertIsNone(normalize_isin("INE002A01019"))
+        self.assertIsNone(normalize_isin("US0378331006"))
+
+    def test_malformed_values_are_rejected(self):
+        for value in (None, "", "INE002A0101", "1NE002A01018", "INE002A0101X"):
+            self.assertIsNone(normalize_isin(value), value)
+
+
+class MapHeaderTest(unittest.TestCase):
+    def test_header_aliases_map_to_fields(self):
+        self.assertEqual(
+            map_header(["Scheme Name", "AMC", "ISIN Code", "Name of the Instrument", "% to NAV"]),
+            {"fund_name": 0, "amc": 1, "isin": 2, "company": 3, "percentage": 4}
+        )
+
+    def test_labels_are_matched_case_and_whitespace_insensitively(self):
+        self.assertEqual(map_header(["  nse   SYMBOL ", "Weight"]), {"symbol": 0, "percentage": 1})
+
+    def test_first_matching_column_wins(self):
+        self.assertEqual(map_header(["Symbol", "Ticker", "% of NAV"]), {"symbol": 0, "percentage": 2})
+
+    def test_rows_without_a_security_or_weight_column_are_not_headers(self):
+        self.assertIsNone(map_header(["Scheme Name", "AMC", "% to NAV"]))
+        self.assertIsNone(map_header(["Symbol", "Company", "Quantity"]))
+        self.assertIsNone(map_header(["HDFC Flexi Cap Fund - Portfolio as on 31-Mar"]))
+
+
+class ParsePercentageTest(unittest.TestCase):
+    def test_numbers_and_formatted_strings(self):
+        self.assertEqual(parse_percentage(4.5), 4.5)
+        self.assertEqual(parse_percentage(" 1,234.5% "), 1234.5)
+        self.assertIsNone(parse_percentage("NIL"))
+        self.assertIsNone(parse_percentage(None))
+
+
+class IsSummaryRowTest(unittest.TestCase):
+    columns = {"fund_name": 0, "symbol": 1, "isin": 2, "company": 3, "percentage": 4}
+
+    def test_total_labels_are_found_in_any_security_column(self):
+        for row in (
+            ["Flexi Cap", "", "", "Grand Total", 100.0],
+            ["Flexi Cap", "Total", "", "", 100.0],
+            ["Flexi Cap", "", "Sub-Total", "", 98.5],
+            ["Flexi Cap", "RELIANCE", "", "Reliance Industries", 9.5, "Net Assets"],
+        ):
+            self.assertTrue(is_summary_row(row, self.columns), row)
+
+    def test_holdings_and_scheme_names_are_not_totals(self):
+        self.assertFalse(is_summary_row(["Flexi Cap", "RELIANCE", "INE002A01018", "Reliance Industries", 9.5], self.columns))
+        self.assertFalse(is_summary_row(["Total Market Fund", "TCS", "", "Tata Consultancy", 4.0], self.columns))
+        self.assertFalse(is_summary_row(["Flexi Cap", "TOTALENERGY", "", "Totalenergies Ltd", 1.0], self.columns))
+
+
+class IngestFileTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with Database(self.pool) as db, db.transaction():
+            db.add_stocks([("s1", "RELIANCE", "Reliance Industries Ltd", 2500.0, 1, "Energy")])
+        self.directory = os.path.dirname(self.path)
+        self.ingestor = DisclosureIngestor(Database(self.pool), self.directory, change_feed=mock.Mock())
+
+    def write_csv(self, *rows):
+        path = os.path.join(self.directory, "portfolio.csv")
+        with open(path, "w", newline="") as csv_file:
+            csv.writer(csv_file).writerows(rows)
+        return path
+
+    def test_summary_rows_are_skipped_whichever_column_labels_them(self):
+        report = self.ingestor.ingest_file(self.write_csv(
+            ["Scheme Name", "Symbol", "ISIN", "Name of the Instrument", "% to NAV"],
+            ["Flexi Cap Fund", "RELIANCE", "INE002A01018", "Reliance Industries", "9.5"],
+            ["Flexi Cap Fund", "Total", "", "", "9.5"],
+            ["Flexi Cap Fund", "", "Grand Total", "", "100"],
+        ))
+        self.assertEqual((report["holdings"], report["unresolved"]), (1, 0))
+        self.assertEqual(self.stored("SELECT stock_id, percentage FROM fund_holdings"), [("s1", 9.5)])
+
+    def test_report_labels_the_peak_as_the_process_peak(self):
+        report = self.ingestor.ingest_file(self.write_csv(["Symbol", "% to NAV"], ["RELIANCE", "9.5"]))
+        self.assertNotIn("peak_rss_mb", report)
+        if disclosures.resource is not None:
+            self.assertGreater(report["process_peak_rss_mb"], 0)
+            self.assertGreaterEqual(report["peak_rss_growth_mb"], 0)
+
+
+class IterXlsxRowsTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix="disclosures-test-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, "portfolio.xlsx")
+
+    def test_cell_types_are_decoded(self):
+        write_xlsx(self.path, [
+            '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c></row>',
+            '<row r="2"><c r="A2" t="inlineStr"><is><t>Reliance</t></is></c><c r="B2"><v>9.5</v></c>'
+            '<c r="C2" t="str"><v>formula text</v></c></row>',
+        ], shared_strings=("Company", "% to NAV"))
+        self.assertEqual(list(iter_xlsx_rows(self.path)), [
+            ["Company", "% to NAV"],
+            ["Reliance", 9.5, "formula text"],
+        ])
+
+    def test_skipped_cells_are_padded_with_blanks(self):
+        write_xlsx(self.path, ['<row r="1"><c r="B1"><v>1</v></c><c r="D1"><v>2</v></c><c r="E1"/></row>'])
+        self.assertEqual(list(iter_xlsx_rows(self.path)), [["", 1.0, "", 2.0, ""]])
+
+    def test_first_sheet_is_found_through_the_workbook_relationships(self):
+        write_xlsx(self.path, ['<row r="1"><c r="A1"><v>7</v></c></row>'], sheet_path="xl/worksheets/portfolio.xml")
+        self.assertEqual(list(iter_xlsx_rows(self.path)), [[7.0]])
+
+    def test_rows_stream_in_order(self):
+        write_xlsx(self.path, [f'<row r="{i}"><c r="A{i}"><v>{i}</v></c></row>' for i in range(1, 1001)])
+        rows = iter_xlsx_rows(self.path)
+        self.assertEqual(next(rows), [1.0])
+        self.assertEqual([row[0] for row in rows], [float(i) for i in range(2, 1001)])
+
+
+if __name__ == "__main__":
+    unittest.main()
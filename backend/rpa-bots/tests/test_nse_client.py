@@ -0,0 +1,150 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from circuit_breaker import OPEN, CircuitBreaker, CircuitOpen
+from deadline import Deadline
+from nse_client import NSEClient
+from response_cache import ResponseCache
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers API calls from the server's scripted (status, headers, body) responses"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/":
+            # The cookie-priming request every new session makes
+            self.server.primes += 1
+            status, headers, body = 200, {}, ""
+        else:
+            self.server.requests.append((self.path, dict(self.headers)))
+            status, headers, body = self.server.responses.pop(0) if self.server.responses else (500, {}, "")
+        payload = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class NSEClientTest(unittest.TestCase):
+    def setUp(self):
+        # Port 0 picks a free port
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.responses = []
+        self.server.requests = []
+        self.server.primes = 0
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def client(self, **kwargs):
+        options = {"max_workers": 1, "timeout": 5, "min_interval": 0, "max_retries": 2, "backoff": 0.01,
+                   "cache": ResponseCache(path="", ttl=0)}
+        options.update(kwargs)
+        client = NSEClient(f"http://127.0.0.1:{self.server.server_port}", **options)
+        # A breaker of its own, so tests neither trip nor inherit the process-wide "nse" one
+        client.breaker = CircuitBreaker("test-nse", failure_threshold=2, reset_timeout=60)
+        self.addCleanup(client.close)
+        return client
+
+    def respond(self, *responses):
+        self.server.responses.extend(responses)
+
+    def test_json_is_fetched_over_one_primed_session(self):
+        self.respond((200, {}, {"data": [1]}), (200, {}, {"data": [2]}))
+        client = self.client()
+        self.assertEqual(client.get_json("/api/allIndices"), {"data": [1]})
+        self.assertEqual(client.get_json("/api/market-data-pre-open", {"key": "NIFTY"}), {"data": [2]})
+        self.assertEqual(self.server.primes, 1)
+        self.assertEqual(self.server.requests[1][0], "/api/market-data-pre-open?key=NIFTY")
+
+    def test_server_errors_are_retried(self):
+        self.respond((503, {}, ""), (502, {}, ""), (200, {}, {"data": []}))
+        self.assertEqual(self.client().get_json("/api/allIndices"), {"data": []})
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_retries_run_out(self):
+        self.respond(*[(500, {}, "")] * 3)
+        with self.assertRaises(requests.HTTPError):
+            self.client().get_json("/api/allIndices")
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_rate_limit_waits_for_retry_after(self):
+        # A back-off of its own would take at least 10 seconds; Retry-After asks for 1
+        self.respond((429, {"Retry-After": "1"}, ""), (200, {}, {"data": []}))
+        start = time.monotonic()
+        self.assertEqual(self.client(backoff=10).get_json("/api/allIndices"), {"data": []})
+        self.assertGreaterEqual(time.monotonic() - start, 1)
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_retry_is_given_up_when_it_would_outlast_the_deadline(self):
+        self.respond((429, {"Retry-After": "30"}, ""), (200, {}, {"data": []}))
+        start = time.monotonic()
+        with self.assertRaises(requests.HTTPError):
+            self.client().get_json("/api/allIndices", deadline=Deadline(2))
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_stale_response_is_revalidated(self):
+        self.respond(
+            (200, {"ETag": '"v1"', "Last-Modified": "Mon, 13 Oct 2026 09:00:00 GMT"}, {"data": ["first"]}),
+            (304, {}, ""),
+        )
+        client = self.client()
+        self.assertEqual(client.get_json("/api/allIndices"), {"data": ["first"]})
+        self.assertEqual(client.get_json("/api/allIndices"), {"data": ["first"]})
+        headers = self.server.requests[1][1]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Mon, 13 Oct 2026 09:00:00 GMT")
+
+    def test_fresh_response_is_served_without_a_request(self):
+        self.respond((200, {}, {"data": []}))
+        client = self.client(cache=ResponseCache(path="", ttl=60))
+        client.get_json("/api/allIndices")
+        client.get_json("/api/allIndices")
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_last_good_response_is_served_while_the_source_fails(self):
+        self.respond((200, {}, {"data": ["good"]}))
+        client = self.client(max_retries=0)
+        client.get_json("/api/allIndices")
+        with self.assertLogs("rpa.nse_client", "WARNING"), self.assertLogs("rpa.circuit_breaker", "WARNING"):
+            self.assertEqual(client.get_json("/api/allIndices"), {"data": ["good"]})
+            self.assertEqual(client.get_json("/api/allIndices"), {"data": ["good"]})
+        self.assertEqual(client.breaker.state, OPEN)
+        # The open circuit still serves the cached response, without a request
+        self.assertEqual(client.get_json("/api/allIndices"), {"data": ["good"]})
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_open_circuit_without_a_cached_response_raises(self):
+        client = self.client(max_retries=0)
+        with self.assertLogs("rpa.circuit_breaker", "WARNING"):
+            for _ in range(2):
+                with self.assertRaises(requests.HTTPError):
+                    client.get_json("/api/allIndices")
+        with self.assertRaises(CircuitOpen):
+            client.get_json("/api/allIndices")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_get_many_returns_none_for_failed_calls(self):
+        self.respond((200, {}, {"data": ["ok"]}))
+        client = self.client(max_retries=0)
+        with self.assertLogs("rpa.nse_client", "WARNING"):
+            results = client.get_many([("/api/ok", None), ("/api/broken", None)])
+        self.assertEqual(results, [{"data": ["ok"]}, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
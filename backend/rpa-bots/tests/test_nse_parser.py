@@ -0,0 +1,70 @@
+import math
+import unittest
+
+import numpy as np
+
+from nse_parser import DEFAULT_NAME, DEFAULT_SECTOR, StockColumns, parse_preopen_payload
+
+
+def payload(*metadata):
+    return {"data": [{"metadata": meta} for meta in metadata]}
+
+
+def quote(symbol="AAA", price=100.0, change=1.5, **fields):
+    return {"symbol": symbol, "companyName": f"{symbol} Ltd", "industry": "Banks",
+            "lastPrice": price, "change": change, **fields}
+
+
+class ParsePreopenPayloadTest(unittest.TestCase):
+    def parse(self, *metadata):
+        return parse_preopen_payload(payload(*metadata), rng=np.random.default_rng(0))
+
+    def test_fields_become_columns(self):
+        columns = self.parse(quote("AAA", 100.0, 1.5), quote("BBB", 50.0, -2.0))
+        self.assertEqual(columns.symbol.tolist(), ["AAA", "BBB"])
+        self.assertEqual(columns.name.tolist(), ["AAA Ltd", "BBB Ltd"])
+        self.assertEqual(columns.price.tolist(), [100.0, 50.0])
+        self.assertEqual(columns.direction().tolist(), ["up", "down"])
+
+    def test_numeric_strings_are_parsed(self):
+        columns = self.parse(quote(price="1,234.50", change=" -3.25 "))
+        self.assertEqual(columns.price.tolist(), [1234.5])
+        self.assertEqual(columns.change.tolist(), [-3.25])
+
+    def test_missing_or_non_numeric_change_stays_unknown(self):
+        columns = self.parse(quote("AAA", change=None), quote("BBB", change="-"), quote("CCC", change=0))
+        self.assertTrue(math.isnan(columns.change[0]) and math.isnan(columns.change[1]))
+        self.assertEqual(columns.direction().tolist(), [None, None, "none"])
+
+    def test_rows_without_a_usable_price_are_dropped(self):
+        columns = self.parse(
+            quote("AAA", price=None), quote("BBB", price="-"), quote("CCC", price=0), quote("DDD", price=float("nan")),
+            quote("EEE", price=12.0)
+        )
+        self.assertEqual(columns.symbol.tolist(), ["EEE"])
+
+    def test_text_columns_are_normalised(self):
+        columns = self.parse(
+            {"symbol": " aaa ", "companyName": None, "industry": "  ", "lastPrice": 10.0, "change": 0},
+            {"symbol": None, "companyName": "No Symbol Ltd", "lastPrice": 10.0, "change": 0},
+        )
+        self.assertEqual(columns.symbol.tolist(), ["AAA"])
+        self.assertEqual(columns.name.tolist(), [DEFAULT_NAME])
+        self.assertEqual(columns.sector.tolist(), [DEFAULT_SECTOR])
+
+    def test_empty_and_malformed_payloads(self):
+        self.assertEqual(len(parse_preopen_payload(None)), 0)
+        self.assertEqual(len(parse_preopen_payload({"declines": 0})), 0)
+        self.assertEqual(len(parse_preopen_payload({"data": [{"detail": {}}]})), 0)
+
+    def test_rows_become_stock_records(self):
+        columns = StockColumns.concat([self.parse(quote("AAA", 10.004, 0.5)), self.parse(quote("AAA", 11.0, None))])
+        stocks = list(columns.unique_symbols().rows(["s1"]))
+        self.assertEqual(len(stocks), 1)
+        self.assertEqual(stocks[0].id, "s1")
+        self.assertEqual(stocks[0].price, 10.0)
+        self.assertEqual(stocks[0].price_change_direction, "up")
+
+
+if __name__ == "__main__":
+    unittest.main()
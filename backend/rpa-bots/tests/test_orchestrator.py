@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+
+from deadline import DeadlineExceeded
+from orchestrator import BotOrchestrator
+
+
+class FakeBot:
+    """Stands in for a BaseBot: runs work(deadline) and records the deadline it was given"""
+
+    def __init__(self, bot_name, work=None):
+        self.bot_name = bot_name
+        self.work = work or (lambda deadline: None)
+        self.deadline = None
+
+    def run(self, deadline=None):
+        self.deadline = deadline
+        self.work(deadline)
+
+
+def fail(deadline):
+    raise ValueError("no data")
+
+
+def overrun(deadline):
+    # Only notices the orchestrator's cancel, not its own expiry, then stops at the check
+    while not deadline.cancelled:
+        time.sleep(0.01)
+    deadline.check()
+
+
+class BotOrchestratorTest(unittest.TestCase):
+    def orchestrator(self, **kwargs):
+        orchestrator = BotOrchestrator(**kwargs)
+        self.addCleanup(orchestrator.shutdown)
+        return orchestrator
+
+    def test_results_per_bot(self):
+        results = self.orchestrator(max_workers=2).run_cycle([FakeBot("ok"), FakeBot("broken", fail)])["bots"]
+        self.assertEqual(results["ok"]["status"], "Success")
+        self.assertIsNone(results["ok"]["error"])
+        self.assertEqual(results["broken"]["status"], "Failure")
+        self.assertEqual(results["broken"]["error"], "no data")
+
+    def test_each_bot_gets_its_own_deadline(self):
+        bots = [FakeBot("first"), FakeBot("second")]
+        self.orchestrator(max_workers=2, bot_timeout=60).run_cycle(bots)
+        self.assertIsNot(bots[0].deadline, bots[1].deadline)
+        self.assertLessEqual(bots[0].deadline.remaining(), 60)
+
+    def test_overrunning_bot_times_out_without_holding_up_the_cycle(self):
+        orchestrator = self.orchestrator(max_workers=2, bot_timeout=0.2)
+        slow, fast = FakeBot("slow", overrun), FakeBot("fast")
+        start = time.monotonic()
+        results = orchestrator.run_cycle([slow, fast])["bots"]
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(results["slow"]["status"], "Timeout")
+        self.assertEqual(results["fast"]["status"], "Success")
+        self.assertTrue(slow.deadline.cancelled)
+        self.assertTrue(orchestrator.drain(timeout=5))
+        self.assertEqual(orchestrator.timed_out, set())
+
+    def test_drain_reports_a_bot_that_ignores_its_deadline(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        orchestrator = self.orchestrator(max_workers=1, bot_timeout=0.1)
+        results = orchestrator.run_cycle([FakeBot("stuck", lambda deadline: release.wait(10))])["bots"]
+        self.assertEqual(results["stuck"]["status"], "Timeout")
+        with self.assertLogs("rpa.orchestrator", "WARNING"):
+            self.assertFalse(orchestrator.drain(timeout=0.1))
+        release.set()
+        self.assertTrue(orchestrator.drain(timeout=5))
+
+    def test_bot_stopping_at_its_own_expired_deadline_is_a_timeout(self):
+        def checks_its_budget(deadline):
+            while True:
+                deadline.check()
+                time.sleep(0.01)
+        results = self.orchestrator(bot_timeout=0.1).run_cycle([FakeBot("budget", checks_its_budget)])["bots"]
+        self.assertEqual(results["budget"]["status"], "Timeout")
+
+    def test_deadline_exceeded_counts_as_a_timeout(self):
+        def give_up(deadline):
+            raise DeadlineExceeded("scrape budget spent")
+        results = self.orchestrator().run_cycle([FakeBot("budget", give_up)])["bots"]
+        self.assertEqual(results["budget"]["status"], "Timeout")
+        self.assertEqual(results["budget"]["error"], "scrape budget spent")
+
+
+if __name__ == "__main__":
+    unittest.main()
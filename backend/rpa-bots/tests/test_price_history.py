@@ -0,0 +1,41 @@
+import time
+import unittest
+
+from price_history import PriceHistory, PriceHistoryRetention
+from test_database import DatabaseTestCase
+
+
+class PriceHistoryTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.history = PriceHistory(self.db)
+
+    def test_ticks_and_candles(self):
+        with self.db:
+            self.history.append([("AAA", 10.0), ("BBB", 5.0)], timestamp=60)
+            self.history.append([("AAA", 12.0)], timestamp=90)
+            self.history.append([("AAA", 11.0)], timestamp=130)
+            self.assertEqual(self.history.ticks("AAA", 0, 120), [(60, 10.0), (90, 12.0)])
+            self.assertEqual(self.history.latest("AAA"), (130, 11.0))
+            self.assertEqual(self.history.ohlc("AAA", 0, 180, 60),
+                             [(60, 10.0, 12.0, 10.0, 12.0, 2), (120, 11.0, 11.0, 11.0, 11.0, 1)])
+
+    def test_prune_drops_older_ticks(self):
+        with self.db:
+            self.history.append([("AAA", 10.0)], timestamp=60)
+            self.history.append([("AAA", 11.0)], timestamp=120)
+            self.assertEqual(self.history.prune(120), 1)
+        self.assertEqual(self.stored("SELECT ts FROM price_ticks"), [(120,)])
+
+    def test_retention_keeps_the_window(self):
+        now = time.time()
+        with self.db:
+            self.history.append([("AAA", 10.0)], timestamp=now - 3 * 24 * 60 * 60)
+            self.history.append([("AAA", 11.0)], timestamp=now - 60)
+        with self.assertLogs("rpa.price_history", "INFO"):
+            self.assertEqual(PriceHistoryRetention(retention_days=2, db=self.db).run(), 1)
+        self.assertEqual(self.stored("SELECT price FROM price_ticks"), [(11.0,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from response_cache import ResponseCache
+
+
+class ResponseCacheFlushTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "responses.json.gz")
+
+    def cache(self, **kwargs):
+        return ResponseCache(path=self.path, **kwargs)
+
+    def test_flushed_entries_are_loaded_back(self):
+        cache = self.cache(flush_interval=0)
+        cache.put("/api/allIndices", {"data": [1]}, etag='"v1"')
+        cache.flush()
+        entry = self.cache().get("/api/allIndices")
+        self.assertEqual(entry.data, {"data": [1]})
+        self.assertEqual(entry.etag, '"v1"')
+
+    def test_unchanged_cache_is_not_rewritten(self):
+        self.cache(flush_interval=0).flush()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_flush_waits_for_the_interval(self):
+        cache = self.cache(flush_interval=60)
+        cache.put("/api/allIndices", {"data": [1]})
+        cache.flush()
+        self.assertFalse(os.path.exists(self.path))
+        cache.flush(force=True)
+        self.assertEqual(len(self.cache()), 1)
+
+    def test_changes_after_a_flush_wait_for_the_next_one(self):
+        cache = self.cache(flush_interval=0)
+        cache.put("/api/allIndices", {"data": [1]})
+        cache.flush()
+        cache.flush_interval = 60
+        cache.put("/api/market-data-pre-open", {"data": [2]})
+        cache.flush()
+        self.assertEqual(len(self.cache()), 1)
+        cache.flush(force=True)
+        self.assertEqual(len(self.cache()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from records import IndexQuote, Stock
+from snapshot import SnapshotCache
+
+
+class SnapshotCacheTest(unittest.TestCase):
+    def setUp(self):
+        # The layout NSEBot uses: keyed on symbol, comparing name, price and sector
+        self.snapshot = SnapshotCache(key_index=1, compare_indexes=(2, 3, 5))
+        self.snapshot.load([("s1", "AAA", "A Ltd", 10.0, 1, "Energy")])
+
+    def test_new_keys_are_changed(self):
+        stock = Stock("s2", "BBB", "B Ltd", 5.0, 1, "Energy")
+        self.assertEqual(self.snapshot.changed([stock]), [stock])
+
+    def test_only_compared_fields_count(self):
+        same = Stock("s1", "AAA", "A Ltd", 10.0, 999, "Energy", "up")
+        moved = Stock("s1", "AAA", "A Ltd", 10.5, 1, "Energy")
+        renamed = Stock("s1", "AAA", "A Limited", 10.0, 1, "Energy")
+        self.assertEqual(self.snapshot.changed([same, moved, renamed]), [moved, renamed])
+
+    def test_changes_are_reported_until_recorded(self):
+        moved = Stock("s1", "AAA", "A Ltd", 10.5, 1, "Energy")
+        self.assertEqual(self.snapshot.changed([moved]), [moved])
+        self.assertEqual(self.snapshot.changed([moved]), [moved])
+        self.snapshot.update([moved])
+        self.assertEqual(self.snapshot.changed([moved]), [])
+        self.assertEqual(self.snapshot.get("AAA"), tuple(moved))
+
+    def test_loaded_rows_and_records_compare_alike(self):
+        snapshot = SnapshotCache(key_index=0, compare_indexes=(2, 3, 4))
+        snapshot.load([["idx1", "NIFTY 50", 100.0, 1.0, 1.01]])
+        self.assertTrue(snapshot.loaded)
+        self.assertEqual(snapshot.changed([IndexQuote("idx1", "NIFTY 50", 100.0, 1.0, 1.01)]), [])
+        self.assertEqual(len(snapshot), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,13 +16,15 @@ export class FundsController {
   async getHoldingsForStock(
     @Param('stockId') stockId: string,
   ): Promise<{ fundName: string; amc: string; percentage: number }[]> {
-    const holdings = await this.databaseService.getHoldings();
-    const funds = await this.databaseService.getFunds();
+    const holdings = await this.databaseService.getHoldingsForStock(stockId);
+    const funds = await this.databaseService.getFundsByIds(
+      holdings.map((h) => h.fund_id),
+    );
+    const fundsById = new Map(funds.map((f) => [f.id, f]));
 
     const holdingInfo = holdings
-      .filter((h) => h.stock_id === stockId)
       .map((holding) => {
-        const fund = funds.find((f) => f.id === holding.fund_id);
+        const fund = fundsById.get(holding.fund_id);
         return {
           fundName: fund?.name || 'Unknown Fund',
           amc: fund?.amc || 'Unknown AMC',
@@ -1,6 +1,7 @@
-import { Entity, Column, PrimaryColumn } from 'typeorm';
+import { Entity, Column, PrimaryColumn, Index } from 'typeorm';
 
 @Entity('fund_holdings')
+@Index('idx_fund_holdings_stock_fund', ['stock_id', 'fund_id'])
 export class FundHolding {
   @PrimaryColumn()
   fund_id: string;
@@ -5,7 +5,7 @@ export class Stock {
   @PrimaryColumn()
   id: string;
 
-  @Column()
+  @Column({ unique: true })
   symbol: string;
 
   @Column()
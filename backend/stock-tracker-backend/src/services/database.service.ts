@@ -1,6 +1,6 @@
 import { Injectable } from '@nestjs/common';
 import { InjectRepository } from '@nestjs/typeorm';
-import { Repository } from 'typeorm';
+import { In, Repository } from 'typeorm';
 import { Stock } from '../entities/Stock.entity';
 import { MutualFund } from '../entities/MutualFund.entity';
 import { FundHolding } from '../entities/FundHolding.entity';
@@ -38,6 +38,22 @@ export class DatabaseService {
     return await this.fundHoldingRepository.find();
   }
 
+  async getHoldingsForStock(stockId: string): Promise<FundHolding[]> {
+    // Served by idx_fund_holdings_stock_fund instead of scanning every holding
+    return await this.fundHoldingRepository.find({
+      where: { stock_id: stockId },
+    });
+  }
+
+  async getFundsByIds(ids: string[]): Promise<MutualFund[]> {
+    if (ids.length === 0) {
+      return [];
+    }
+    return await this.mutualFundRepository.find({
+      where: { id: In(ids) },
+    });
+  }
+
   async getLogs(): Promise<BotLog[]> {
     return await this.botLogRepository.find({
       order: {